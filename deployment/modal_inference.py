@@ -5,18 +5,22 @@ API-compatible with RunPod interface for drop-in replacement
 Model: jasonlevy/roastme-model-v1 (Qwen2.5-VL-7B fine-tuned on r/RoastMe)
 Cost: ~$0.00376/sec when running (H100 GPU)
 Cold start: ~5-10 seconds (H100 is fast!)
-Endpoints:
-  POST /upload          → {imageId}
+Endpoints (single "api" web app):
+  POST /upload          → {imageId}   (multipart "file" or JSON {imageBase64})
   POST /generate-batch  → {candidates: string[], count: number}
+  POST /generate        → {roast: string}
+  POST /generate-stream → text/event-stream of roast text chunks
+  POST /roast           → {candidates: string[], count: number}  (upload + generate-batch in one call)
 """
 
-import io
 import modal
 import uuid
 import time
 from pathlib import Path
 from datetime import datetime
 
+from roast_api import build_messages, make_api
+
 # ==========================================
 # Configuration
 # ==========================================
@@ -25,6 +29,17 @@ MODEL_ID = "jasonlevy/roastme-model-v1"
 GPU_CONFIG = "H100"
 SCALEDOWN_WINDOW = 300
 CACHE_DIR = "/cache"
+COMPILE_MODEL = True          # torch.compile the decoder forward on startup
+WARMUP_MAX_NEW_TOKENS = 8
+WARMUP_NUM_CANDIDATES = 3     # Matches the default /generate-batch request
+WARMUP_SEQ_LEN = 2048         # Prompt + generation length used to pre-grow the allocator
+PROMPT_BUCKET = 64            # Pad prompts to a multiple of this for CUDA-graph reuse
+PROMPT_LOOKUP_NUM_TOKENS = 5  # N-gram speculation for single-candidate requests (0 = off, uncompiled only)
+ATTN_IMPLEMENTATION = "flash_attention_2"  # Falls back to "sdpa" if flash-attn is missing
+QUANTIZATION = "int4"         # Weight-only quantization of the LLM: "int4", "fp8" or None
+IMAGE_MIN_PIXELS = 256 * 28 * 28  # Match --image_min_pixels/--image_max_pixels used
+IMAGE_MAX_PIXELS = 768 * 28 * 28  # in finetune_roastme_simple.sh (bounds image tokens)
+IMAGE_CACHE_MAX_BYTES = 4 * 1024**3  # GPU bytes budget for cached pixel_values + embeddings (LRU)
 
 # ==========================================
 # Docker Image Setup
@@ -36,14 +51,21 @@ image = (
         "transformers==4.56.1",
         "torch==2.8.0",
         "torchvision==0.23.0",
-        "qwen-vl-utils",
         "Pillow",
         "accelerate",
+        "torchao==0.13.0",
+        "cachetools",
+        "pybase64",
         "huggingface_hub",
         "hf-transfer",
         "fastapi[standard]",
+        "packaging",
+        "wheel",
     )
+    # flash-attn needs torch at build time; its setup fetches a prebuilt wheel
+    .pip_install("flash-attn==2.8.3", extra_options="--no-build-isolation")
     .env({"HF_HUB_ENABLE_HF_TRANSFER": "1"})
+    .add_local_python_source("roast_api")
 )
 
 cache_volume = modal.Volume.from_name("roastme-model-cache", create_if_missing=True)
@@ -54,21 +76,135 @@ app = modal.App(
 )
 
 # ==========================================
-# System Message & Prompt (MATCHES TRAINING DATA)
+# Helpers
 # ==========================================
 
-SYSTEM_MESSAGE = """You are a sharp-witted roast comedian performing in a consensual roast battle inspired by Reddit's r/RoastMe. Generate one savage, hilarious roast based ONLY on what you see in the photo.
+def resolve_model_path() -> str:
+    """
+    Return a local snapshot directory for MODEL_ID
+    
+    Warm cache volumes resolve from local files, and from_pretrained is then
+    given that directory, so it makes no Hub round-trips; the first container
+    downloads the snapshot and commits it to the volume.
+    """
+    from huggingface_hub import snapshot_download
+    
+    try:
+        model_path = snapshot_download(MODEL_ID, cache_dir=CACHE_DIR, local_files_only=True)
+        print("📦 Using cached model snapshot")
+    except Exception:
+        model_path = snapshot_download(MODEL_ID, cache_dir=CACHE_DIR)
+        cache_volume.commit()
+    
+    return model_path
 
-Rules:
-- Attack specific visual details: appearance, expression, outfit, setting
-- Use clever comparisons and pop culture references  
-- Keep it punchy: 1-2 sentences, under 100 characters ideal
-- Be brutally funny - no holding back
-- No hedging, no apologies, just pure roast
+def quantize_language_model(model, scheme: str):
+    """
+    Quantize decoder Linear weights in place with torchao
+    
+    The vision tower and lm_head stay in bf16; decode is bandwidth-bound
+    on the decoder weights, which is where the savings matter.
+    """
+    import torch
+    from torchao.quantization import (
+        quantize_,
+        Int4WeightOnlyConfig,
+        Float8DynamicActivationFloat8WeightConfig,
+    )
+    
+    configs = {
+        "int4": lambda: Int4WeightOnlyConfig(group_size=128),
+        "fp8": lambda: Float8DynamicActivationFloat8WeightConfig(),
+    }
+    if scheme not in configs:
+        raise ValueError(f"Unknown quantization scheme: {scheme}")
+    
+    def filter_fn(module, fqn: str) -> bool:
+        return (
+            isinstance(module, torch.nn.Linear)
+            and "visual" not in fqn
+            and "lm_head" not in fqn
+        )
+    
+    quantize_(model, configs[scheme](), filter_fn=filter_fn)
+    print(f"🗜️  Quantized language model weights ({scheme})")
 
-Deliver a devastating one-liner like a standup comedian."""
+def decode_image_on_device(image_bytes: bytes, device):
+    """
+    Decode image bytes straight to a uint8 RGB tensor on device
+    
+    JPEGs are decoded by nvjpeg on the GPU; other formats are decoded on
+    CPU and only the compact uint8 tensor is copied over.
+    """
+    import torch
+    from torchvision.io import decode_image, decode_jpeg, ImageReadMode
+    
+    data = torch.frombuffer(bytearray(image_bytes), dtype=torch.uint8)
+    
+    if image_bytes[:3] == b"\xff\xd8\xff" and torch.device(device).type == "cuda":
+        return decode_jpeg(data, mode=ImageReadMode.RGB, device=device)
+    
+    return decode_image(data, mode=ImageReadMode.RGB).to(device, non_blocking=True)
 
-USER_PROMPT = "Roast this person based on their appearance."
+def pad_to_bucket(inputs, pad_token_id: int, bucket: int = PROMPT_BUCKET) -> dict:
+    """
+    Left-pad input_ids/attention_mask up to the next multiple of bucket
+    
+    Images of similar size then share a prompt length, so the static
+    cache and captured graphs are reused across requests.
+    """
+    import torch.nn.functional as F
+    
+    inputs = dict(inputs)
+    pad_len = -inputs["input_ids"].shape[1] % bucket
+    if pad_len:
+        inputs["input_ids"] = F.pad(inputs["input_ids"], (pad_len, 0), value=pad_token_id)
+        inputs["attention_mask"] = F.pad(inputs["attention_mask"], (pad_len, 0), value=0)
+    return inputs
+
+def cache_entry_nbytes(entry: dict) -> int:
+    """Approximate device memory held by one image_cache entry"""
+    pixel_values = entry["inputs"]["pixel_values"]
+    image_embeds = entry["image_embeds"]
+    return (
+        pixel_values.numel() * pixel_values.element_size()
+        + image_embeds.numel() * image_embeds.element_size()
+    )
+
+def tile_inputs(inputs, num_candidates: int) -> dict:
+    """
+    Replicate single-image processor outputs along the batch dimension
+    
+    pixel_values is left untiled: image features come from the embedding
+    cache (see install_image_embeds_cache), the model only needs a non-None
+    pixel_values to take the image branch.
+    """
+    return {
+        "input_ids": inputs["input_ids"].repeat(num_candidates, 1),
+        "attention_mask": inputs["attention_mask"].repeat(num_candidates, 1),
+        "pixel_values": inputs["pixel_values"],
+        "image_grid_thw": inputs["image_grid_thw"].repeat(num_candidates, 1),
+    }
+
+def install_image_embeds_cache(model):
+    """
+    Patch get_image_features so precomputed vision-tower outputs are reused
+    
+    While model.model.cached_image_embeds is set, every image in the batch
+    is served from it instead of running the ViT. Feeding inputs_embeds to
+    generate directly is not an option: Qwen2.5-VL needs input_ids at
+    prefill to build its multimodal RoPE positions.
+    """
+    inner = model.model
+    inner.cached_image_embeds = None
+    original_get_image_features = inner.get_image_features
+    
+    def get_image_features(pixel_values, image_grid_thw=None):
+        if inner.cached_image_embeds is None:
+            return original_get_image_features(pixel_values, image_grid_thw)
+        return (inner.cached_image_embeds,) * image_grid_thw.shape[0]
+    
+    inner.get_image_features = get_image_features
 
 # ==========================================
 # Model Class
@@ -88,59 +224,259 @@ class RoastModel:
     @modal.enter()
     def load_model(self):
         """Load model on container startup (runs once per container)"""
+        if getattr(self, "_loaded", False):
+            return
+        
         from transformers import Qwen2_5_VLForConditionalGeneration, AutoProcessor
+        from transformers.utils import is_flash_attn_2_available
         import torch
         
-        self.image_cache = {}
+        from cachetools import LRUCache
+        
+        self.image_cache = LRUCache(maxsize=IMAGE_CACHE_MAX_BYTES, getsizeof=cache_entry_nbytes)
         
         print(f"🔄 Loading model: {MODEL_ID}")
         start_time = time.time()
         
+        model_path = resolve_model_path()
+        
+        # The fast (torch-based) image processor resizes and normalizes
+        # tensors on the GPU instead of going through PIL + NumPy
         self.processor = AutoProcessor.from_pretrained(
-            MODEL_ID,
+            model_path,
             trust_remote_code=True,
-            cache_dir=CACHE_DIR
+            use_fast=True,
+            min_pixels=IMAGE_MIN_PIXELS,
+            max_pixels=IMAGE_MAX_PIXELS
         )
         
+        attn_implementation = ATTN_IMPLEMENTATION
+        if attn_implementation == "flash_attention_2" and not is_flash_attn_2_available():
+            print("⚠️  flash-attn not available, falling back to SDPA")
+            attn_implementation = "sdpa"
+        
+        # device_map streams safetensors shards straight onto the GPU
         self.model = Qwen2_5_VLForConditionalGeneration.from_pretrained(
-            MODEL_ID,
+            model_path,
             dtype=torch.bfloat16,
+            attn_implementation=attn_implementation,
             device_map="auto",
-            trust_remote_code=True,
-            cache_dir=CACHE_DIR
+            trust_remote_code=True
+        )
+        print(f"⚡ Attention backend: {self.model.config._attn_implementation}")
+        self.model.eval()
+        
+        # The chat template only emits an image placeholder, so the prompt
+        # text is identical for every request and can be rendered once
+        self.prompt_text = self.processor.apply_chat_template(
+            build_messages(None),
+            tokenize=False,
+            add_generation_prompt=True
         )
         
+        if QUANTIZATION:
+            quantize_language_model(self.model, QUANTIZATION)
+        
+        # Static KV cache keeps decode shapes fixed so the compiled
+        # graph can be replayed each step instead of re-captured
+        self.model.generation_config.cache_implementation = "static"
+        
+        if COMPILE_MODEL:
+            # Compile only the language model: the ViT runs once per prefill,
+            # while the decoder forward runs once per generated token
+            language_model = self.model.language_model
+            language_model.forward = torch.compile(
+                language_model.forward,
+                mode="reduce-overhead",
+                fullgraph=False,
+                dynamic=True
+            )
+        
+        install_image_embeds_cache(self.model)
+        
         load_time = time.time() - start_time
         print(f"✅ Model loaded in {load_time:.2f}s")
+        
+        self._warmup()
+        self._loaded = True
+    
+    def _encode_image(self, image) -> dict:
+        """
+        Preprocess one image and run the vision tower on the model device
+        
+        Args:
+            image: uint8 RGB tensor (C, H, W), ideally already on the model device
+            
+        Returns:
+            dict with processor 'inputs' and the ViT 'image_embeds'
+        """
+        import torch
+        
+        # Cached tensors are only ever consumed under inference_mode too
+        with torch.inference_mode():
+            inputs = self.processor(
+                text=[self.prompt_text],
+                images=[image],
+                padding=True,
+                device=self.model.device,
+                return_tensors="pt"
+            ).to(self.model.device, non_blocking=True)
+            
+            # Store pixel_values in the model dtype so generate skips the cast
+            inputs = pad_to_bucket(inputs, self.processor.tokenizer.pad_token_id)
+            inputs["pixel_values"] = inputs["pixel_values"].to(self.model.dtype)
+            
+            image_embeds = self.model.get_image_features(
+                inputs["pixel_values"],
+                inputs["image_grid_thw"]
+            )[0]
+        
+        return {"inputs": inputs, "image_embeds": image_embeds}
+    
+    def _generate(self, encoded: dict, num_candidates: int, **generate_kwargs) -> list:
+        """Generate num_candidates roasts for an encoded image in one batched call"""
+        import torch
+        
+        # Prompt-lookup speculation only supports batch size 1 and a
+        # dynamic cache, so it is limited to single-candidate requests. The
+        # growing cache changes shapes every step, which would make the
+        # reduce-overhead compiled forward re-record its CUDA graphs, so it
+        # only runs when the decoder is not compiled
+        if PROMPT_LOOKUP_NUM_TOKENS and num_candidates == 1 and not COMPILE_MODEL:
+            generate_kwargs["prompt_lookup_num_tokens"] = PROMPT_LOOKUP_NUM_TOKENS
+            generate_kwargs["cache_implementation"] = "dynamic"
+        
+        with torch.inference_mode():
+            # Tile the cached prompt so every candidate shares one prefill
+            # and one batched decode instead of N sequential generations
+            inputs = tile_inputs(encoded["inputs"], num_candidates)
+            
+            self.model.model.cached_image_embeds = encoded["image_embeds"]
+            try:
+                generated_ids = self.model.generate(
+                    **inputs,
+                    **generate_kwargs,
+                    do_sample=True,
+                    num_return_sequences=1,
+                    repetition_penalty=1.2      # Prevent repetition (vectorized)
+                )
+            finally:
+                self.model.model.cached_image_embeds = None
+            
+            # Every row shares the same (bucketed) prompt length, so one slice
+            # strips the prompt from all candidates
+            input_len = inputs["input_ids"].shape[1]
+            output_texts = self.processor.batch_decode(
+                generated_ids[:, input_len:],
+                skip_special_tokens=True,
+                clean_up_tokenization_spaces=False
+            )
+        
+        return [text.strip() for text in output_texts]
+    
+    def _warmup(self):
+        """
+        Exercise the full request path so the first user request runs at
+        steady-state latency (compile caches, attention kernels, allocator)
+        """
+        import torch
+        
+        start_time = time.time()
+        
+        dummy_image = torch.zeros((3, 224, 224), dtype=torch.uint8, device=self.model.device)
+        encoded = self._encode_image(dummy_image)
+        
+        # Batched path (/generate-batch) and single-candidate path (/generate)
+        for num_candidates in (WARMUP_NUM_CANDIDATES, 1):
+            self._generate(
+                encoded,
+                num_candidates,
+                max_new_tokens=WARMUP_MAX_NEW_TOKENS
+            )
+        
+        # Grow the caching allocator to roughly steady-state size up front
+        hidden_size = self.model.config.text_config.hidden_size
+        scratch = torch.empty(
+            (WARMUP_NUM_CANDIDATES, WARMUP_SEQ_LEN, hidden_size),
+            dtype=self.model.dtype,
+            device=self.model.device
+        )
+        del scratch
+        
+        torch.cuda.synchronize()
+        print(f"🔥 Warmup finished in {time.time() - start_time:.2f}s")
 
     @modal.method()
-    def upload_image(self, image_base64: str) -> str:
+    def upload_image(self, image_bytes: bytes) -> str:
         """
         Upload and cache an image, return image_id
         
         Args:
-            image_base64: Base64-encoded image string
+            image_bytes: Raw encoded image bytes (JPEG/PNG/...)
             
         Returns:
             image_id: UUID for the cached image
         """
-        import base64
-        from PIL import Image
-        
         image_id = str(uuid.uuid4())
         
-        image_bytes = base64.b64decode(image_base64)
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        image = decode_image_on_device(image_bytes, self.model.device)
         
+        # Preprocess and run the vision tower once at upload so
+        # generate_batch only has to run the language model
         self.image_cache[image_id] = {
-            "image": image,
+            **self._encode_image(image),
             "created_at": datetime.now().isoformat()
         }
-        
         print(f"📤 Uploaded image: {image_id} (cache size: {len(self.image_cache)})")
         
         return image_id
     
+    @modal.method()
+    def roast_image(
+        self,
+        image_bytes: bytes,
+        num_candidates: int = 3,
+        temperature: float = 0.85,
+        top_p: float = 0.9,
+        top_k: int = 50,
+        max_new_tokens: int = 80
+    ) -> dict:
+        """
+        Upload + generate_batch in one call, for clients that roast an image once
+        
+        The image is encoded and used in-process, never cached, so there is no
+        imageId round trip and no chance of the generate call landing on a
+        container that did not receive the upload.
+        
+        Returns:
+            Same dict as generate_batch
+        """
+        image = decode_image_on_device(image_bytes, self.model.device)
+        encoded = self._encode_image(image)
+        
+        print(f"🎯 Generating {num_candidates} roasts for an inline image")
+        start_time = time.time()
+        
+        candidates = self._generate(
+            encoded,
+            num_candidates,
+            max_new_tokens=max_new_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k
+        )
+        
+        inference_time = time.time() - start_time
+        print(f"✅ Generated {len(candidates)} roasts in {inference_time:.2f}s: "
+              + " | ".join(c[:80] for c in candidates))
+        
+        return {
+            "candidates": candidates,
+            "count": len(candidates),
+            "inference_time_seconds": round(inference_time, 2),
+            "model": MODEL_ID
+        }
+    
     @modal.method()
     def generate_batch(
         self,
@@ -165,83 +501,25 @@ class RoastModel:
         Returns:
             dict with 'candidates' list and 'count'
         """
-        from qwen_vl_utils import process_vision_info
-        import torch
-        import random
-        
         if image_id not in self.image_cache:
             raise ValueError(f"Image ID {image_id} not found in cache")
         
-        image = self.image_cache[image_id]["image"]
-        
         print(f"🎯 Generating {num_candidates} roasts for image {image_id}")
         start_time = time.time()
         
-        candidates = []
-        
-        for i in range(num_candidates):
-            messages = [
-                {
-                    "role": "system",
-                    "content": [{"type": "text", "text": SYSTEM_MESSAGE}]
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "image", "image": image},
-                        {"type": "text", "text": USER_PROMPT}
-                    ]
-                }
-            ]
-            
-            text = self.processor.apply_chat_template(
-                messages,
-                tokenize=False,
-                add_generation_prompt=True
-            )
-            
-            image_inputs, video_inputs = process_vision_info(messages)
-            
-            inputs = self.processor(
-                text=[text],
-                images=image_inputs,
-                videos=video_inputs,
-                padding=True,
-                return_tensors="pt"
-            ).to(self.model.device)
-            
-            # Different seed per candidate for variety
-            seed = random.randint(0, 1000000)
-            torch.manual_seed(seed)
-            
-            # Generation parameters tuned for ~71 char roasts
-            generated_ids = self.model.generate(
-                **inputs,
-                max_new_tokens=max_new_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                top_k=top_k,
-                do_sample=True,
-                repetition_penalty=1.2,     # Prevent repetition
-                no_repeat_ngram_size=2      # Block 2-gram repetition
-            )
-            
-            generated_ids_trimmed = [
-                out_ids[len(in_ids):] 
-                for in_ids, out_ids in zip(inputs.input_ids, generated_ids)
-            ]
-            
-            output_text = self.processor.batch_decode(
-                generated_ids_trimmed,
-                skip_special_tokens=True,
-                clean_up_tokenization_spaces=False
-            )[0].strip()
-            
-            candidates.append(output_text)
-            print(f"  🔥 Candidate {i+1}/{num_candidates}: {output_text[:80]}...")
+        # Generation parameters tuned for ~71 char roasts
+        candidates = self._generate(
+            self.image_cache[image_id],
+            num_candidates,
+            max_new_tokens=max_new_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k
+        )
         
         inference_time = time.time() - start_time
-        print(f"✅ Generated {len(candidates)} roasts in {inference_time:.2f}s")
+        print(f"✅ Generated {len(candidates)} roasts in {inference_time:.2f}s: "
+              + " | ".join(c[:80] for c in candidates))
         
         return {
             "candidates": candidates,
@@ -250,118 +528,79 @@ class RoastModel:
             "model": MODEL_ID
         }
 
-# ==========================================
-# REST API Endpoints (RunPod-compatible)
-# ==========================================
-
-@app.function()
-@modal.asgi_app()
-def upload():
-    """
-    Upload image and get image_id
-    
-    POST /upload
-    Body: {"imageBase64": "..."}
-    Returns: {"imageId": "uuid"}
-    """
-    from fastapi import FastAPI, HTTPException
-    from pydantic import BaseModel
-    
-    web_app = FastAPI()
-    
-    class UploadRequest(BaseModel):
-        imageBase64: str
-    
-    @web_app.post("/")
-    async def handle_upload(request: UploadRequest):
-        if not request.imageBase64:
-            raise HTTPException(status_code=400, detail="Missing imageBase64")
+    @modal.method()
+    def generate_stream(
+        self,
+        image_id: str,
+        temperature: float = 0.85,
+        top_p: float = 0.9,
+        top_k: int = 50,
+        max_new_tokens: int = 80
+    ):
+        """
+        Stream a single roast for a cached image as text chunks
         
-        model = RoastModel()
-        image_id = model.upload_image.remote(request.imageBase64)
+        Generation runs in a background thread feeding a TextIteratorStreamer,
+        so chunks are yielded while later tokens are still being decoded.
         
-        return {"imageId": image_id}
-    
-    return web_app
-
-@app.function()
-@modal.asgi_app()
-def generate_batch():
-    """
-    Generate multiple roasts for a cached image
-    
-    POST /generate-batch
-    Body: {"imageId": "uuid", "numCandidates": 3}
-    Returns: {"candidates": [...], "count": 3}
-    """
-    from fastapi import FastAPI, HTTPException
-    from pydantic import BaseModel
-    
-    web_app = FastAPI()
-    
-    class GenerateRequest(BaseModel):
-        imageId: str
-        numCandidates: int = 3
-    
-    @web_app.post("/")
-    async def handle_generate(request: GenerateRequest):
-        if not request.imageId:
-            raise HTTPException(status_code=400, detail="Missing imageId")
+        Yields:
+            Decoded text chunks in generation order
+        """
+        import threading
+        from transformers import TextIteratorStreamer
         
-        try:
-            model = RoastModel()
-            result = model.generate_batch.remote(
-                image_id=request.imageId,
-                num_candidates=request.numCandidates
-            )
-            return result
-        except ValueError as e:
-            raise HTTPException(status_code=404, detail=str(e))
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
-    
-    return web_app
+        if image_id not in self.image_cache:
+            raise ValueError(f"Image ID {image_id} not found in cache")
+        
+        # timeout backstops a generation thread that stalls without raising
+        # (iteration then raises queue.Empty instead of blocking forever)
+        streamer = TextIteratorStreamer(
+            self.processor.tokenizer,
+            skip_prompt=True,
+            skip_special_tokens=True,
+            timeout=120
+        )
+        
+        errors = []
+        
+        def run_generation():
+            # Always end the stream, so a failed generate() (OOM, bad kwargs)
+            # stops the consumer loop and its error can be re-raised below
+            try:
+                self._generate(
+                    self.image_cache[image_id],
+                    1,
+                    streamer=streamer,
+                    max_new_tokens=max_new_tokens,
+                    temperature=temperature,
+                    top_p=top_p,
+                    top_k=top_k
+                )
+            except Exception as e:
+                errors.append(e)
+            finally:
+                streamer.end()
+        
+        thread = threading.Thread(target=run_generation)
+        thread.start()
+        
+        for chunk in streamer:
+            if chunk:
+                yield chunk
+        
+        thread.join()
+        if errors:
+            raise errors[0]
+
+# ==========================================
+# REST API Endpoints (RunPod-compatible, see roast_api.py)
+# ==========================================
 
 @app.function()
 @modal.asgi_app()
-def generate():
-    """
-    Generate a single roast (legacy endpoint)
-    
-    POST /generate
-    Body: {"imageId": "uuid"}
-    Returns: {"roast": "..."}
-    """
-    from fastapi import FastAPI, HTTPException
-    from pydantic import BaseModel
-    
-    web_app = FastAPI()
-    
-    class GenerateRequest(BaseModel):
-        imageId: str
-    
-    @web_app.post("/")
-    async def handle_generate(request: GenerateRequest):
-        if not request.imageId:
-            raise HTTPException(status_code=400, detail="Missing imageId")
-        
-        try:
-            model = RoastModel()
-            result = model.generate_batch.remote(
-                image_id=request.imageId,
-                num_candidates=1
-            )
-            return {
-                "roast": result["candidates"][0],
-                "inference_time_seconds": result["inference_time_seconds"],
-                "model": result["model"]
-            }
-        except ValueError as e:
-            raise HTTPException(status_code=404, detail=str(e))
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
-    
-    return web_app
+def api():
+    """Single web app serving every route through one shared RoastModel handle"""
+    return make_api(RoastModel)
 
 # ==========================================
 # Local Testing
@@ -374,8 +613,6 @@ def test():
     
     Usage: modal run deployment/modal_inference.py
     """
-    import base64
-    
     test_image_path = input("Enter path to test image (or press Enter to skip): ").strip()
     
     if not test_image_path or not Path(test_image_path).exists():
@@ -384,13 +621,12 @@ def test():
     
     with open(test_image_path, "rb") as f:
         image_bytes = f.read()
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
     
     print(f"\n🔥 Testing with: {test_image_path}\n")
     
     model = RoastModel()
     print("📤 Uploading image...")
-    image_id = model.upload_image.remote(image_base64)
+    image_id = model.upload_image.remote(image_bytes)
     print(f"✅ Image uploaded: {image_id}\n")
     
     print("🎯 Generating 3 roasts...")
@@ -0,0 +1,313 @@
+"""
+Modal serverless deployment for DissTrack Roast Model (vLLM backend)
+Same prompt and "api" web app as modal_inference.py (both from roast_api.py),
+served through vLLM instead of transformers.generate
+
+vLLM samples all candidates for a request from one prefill via
+SamplingParams(n=N), with PagedAttention and fused kernels. The offline LLM
+engine is synchronous, so each container serves one request at a time.
+
+Model: jasonlevy/roastme-model-v1 (Qwen2.5-VL-7B fine-tuned on r/RoastMe)
+Endpoints (single "api" web app):
+  POST /upload          → {imageId}   (multipart "file" or JSON {imageBase64})
+  POST /generate-batch  → {candidates: string[], count: number}
+  POST /generate        → {roast: string}
+  POST /generate-stream → text/event-stream (the roast arrives as one chunk)
+  POST /roast           → {candidates: string[], count: number}  (upload + generate-batch in one call)
+"""
+
+import io
+import modal
+import uuid
+import time
+from datetime import datetime
+
+from roast_api import build_messages, make_api
+
+# ==========================================
+# Configuration
+# ==========================================
+
+MODEL_ID = "jasonlevy/roastme-model-v1"
+GPU_CONFIG = "H100"
+SCALEDOWN_WINDOW = 300
+CACHE_DIR = "/cache"
+MAX_MODEL_LEN = 2048
+IMAGE_CACHE_MAX_BYTES = 1024**3  # Host RAM budget for cached decoded images (LRU)
+
+# ==========================================
+# Docker Image Setup
+# ==========================================
+
+image = (
+    modal.Image.debian_slim(python_version="3.11")
+    .pip_install(
+        "vllm==0.10.2",
+        "transformers==4.56.1",
+        "qwen-vl-utils",
+        "Pillow",
+        "cachetools",
+        "pybase64",
+        "huggingface_hub",
+        "hf-transfer",
+        "fastapi[standard]",
+    )
+    .env({"HF_HUB_ENABLE_HF_TRANSFER": "1"})
+    .add_local_python_source("roast_api")
+)
+
+cache_volume = modal.Volume.from_name("roastme-model-cache", create_if_missing=True)
+
+app = modal.App(
+    "disstrack-roast-vllm",
+    image=image,
+)
+
+# ==========================================
+# Helpers
+# ==========================================
+
+def decode_image(image_bytes: bytes):
+    """Decode raw image bytes to an RGB PIL image"""
+    from PIL import Image
+
+    return Image.open(io.BytesIO(image_bytes)).convert("RGB")
+
+def cache_entry_nbytes(entry: dict) -> int:
+    """Approximate host memory held by one image_cache entry"""
+    image = entry["image"]
+    return image.width * image.height * len(image.getbands())
+
+# ==========================================
+# Model Class
+# ==========================================
+
+@app.cls(
+    gpu=GPU_CONFIG,
+    timeout=300,
+    scaledown_window=SCALEDOWN_WINDOW,
+    volumes={CACHE_DIR: cache_volume},
+)
+class RoastModel:
+    """
+    Serverless roast model inference on vLLM with image caching
+    """
+
+    @modal.enter()
+    def load_model(self):
+        """Load model on container startup (runs once per container)"""
+        from transformers import AutoProcessor
+        from vllm import LLM
+        from cachetools import LRUCache
+
+        self.image_cache = LRUCache(maxsize=IMAGE_CACHE_MAX_BYTES, getsizeof=cache_entry_nbytes)
+
+        print(f"🔄 Loading model: {MODEL_ID}")
+        start_time = time.time()
+
+        processor = AutoProcessor.from_pretrained(
+            MODEL_ID,
+            trust_remote_code=True,
+            cache_dir=CACHE_DIR
+        )
+
+        # The chat template only emits an image placeholder, so the prompt
+        # text is identical for every request and can be rendered once
+        self.prompt_text = processor.apply_chat_template(
+            build_messages(None),
+            tokenize=False,
+            add_generation_prompt=True
+        )
+
+        self.llm = LLM(
+            model=MODEL_ID,
+            dtype="bfloat16",
+            max_model_len=MAX_MODEL_LEN,
+            limit_mm_per_prompt={"image": 1},
+            download_dir=CACHE_DIR,
+            trust_remote_code=True
+        )
+
+        load_time = time.time() - start_time
+        print(f"✅ Model loaded in {load_time:.2f}s")
+
+    def _generate(
+        self,
+        image,
+        num_candidates: int,
+        temperature: float = 0.85,
+        top_p: float = 0.9,
+        top_k: int = 50,
+        max_new_tokens: int = 80
+    ) -> list:
+        """Sample num_candidates roasts for a PIL image"""
+        from vllm import SamplingParams
+
+        # n=num_candidates samples every candidate from a single prefill
+        sampling_params = SamplingParams(
+            n=num_candidates,
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k,
+            max_tokens=max_new_tokens,
+            repetition_penalty=1.2
+        )
+
+        outputs = self.llm.generate(
+            [{"prompt": self.prompt_text, "multi_modal_data": {"image": image}}],
+            sampling_params
+        )
+
+        return [completion.text.strip() for completion in outputs[0].outputs]
+
+    @modal.method()
+    def upload_image(self, image_bytes: bytes) -> str:
+        """
+        Upload and cache an image, return image_id
+
+        Args:
+            image_bytes: Raw encoded image bytes (JPEG/PNG/...)
+
+        Returns:
+            image_id: UUID for the cached image
+        """
+        image_id = str(uuid.uuid4())
+
+        self.image_cache[image_id] = {
+            "image": decode_image(image_bytes),
+            "created_at": datetime.now().isoformat()
+        }
+
+        print(f"📤 Uploaded image: {image_id} (cache size: {len(self.image_cache)})")
+
+        return image_id
+
+    @modal.method()
+    def roast_image(
+        self,
+        image_bytes: bytes,
+        num_candidates: int = 3,
+        temperature: float = 0.85,
+        top_p: float = 0.9,
+        top_k: int = 50,
+        max_new_tokens: int = 80
+    ) -> dict:
+        """
+        Upload + generate_batch in one call, for clients that roast an image once
+        The image is used in-process and never cached
+
+        Returns:
+            Same dict as generate_batch
+        """
+        image = decode_image(image_bytes)
+
+        print(f"🎯 Generating {num_candidates} roasts for an inline image")
+        start_time = time.time()
+
+        candidates = self._generate(
+            image,
+            num_candidates,
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k,
+            max_new_tokens=max_new_tokens
+        )
+
+        inference_time = time.time() - start_time
+        print(f"✅ Generated {len(candidates)} roasts in {inference_time:.2f}s")
+
+        return {
+            "candidates": candidates,
+            "count": len(candidates),
+            "inference_time_seconds": round(inference_time, 2),
+            "model": MODEL_ID
+        }
+
+    @modal.method()
+    def generate_batch(
+        self,
+        image_id: str,
+        num_candidates: int = 3,
+        temperature: float = 0.85,
+        top_p: float = 0.9,
+        top_k: int = 50,
+        max_new_tokens: int = 80
+    ) -> dict:
+        """
+        Generate multiple roasts for a cached image
+
+        Args:
+            image_id: UUID from upload_image
+            num_candidates: Number of roasts to generate (default: 3)
+            temperature: Sampling temperature (default: 0.85)
+            top_p: Nucleus sampling threshold (default: 0.9)
+            top_k: Top-k sampling (default: 50)
+            max_new_tokens: Max tokens per roast (default: 80)
+
+        Returns:
+            dict with 'candidates' list and 'count'
+        """
+        if image_id not in self.image_cache:
+            raise ValueError(f"Image ID {image_id} not found in cache")
+
+        print(f"🎯 Generating {num_candidates} roasts for image {image_id}")
+        start_time = time.time()
+
+        candidates = self._generate(
+            self.image_cache[image_id]["image"],
+            num_candidates,
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k,
+            max_new_tokens=max_new_tokens
+        )
+
+        inference_time = time.time() - start_time
+        print(f"✅ Generated {len(candidates)} roasts in {inference_time:.2f}s")
+
+        return {
+            "candidates": candidates,
+            "count": len(candidates),
+            "inference_time_seconds": round(inference_time, 2),
+            "model": MODEL_ID
+        }
+
+    @modal.method()
+    def generate_stream(
+        self,
+        image_id: str,
+        temperature: float = 0.85,
+        top_p: float = 0.9,
+        top_k: int = 50,
+        max_new_tokens: int = 80
+    ):
+        """
+        Stream a single roast for a cached image
+
+        The offline vLLM engine returns finished completions only, so the
+        roast arrives as one chunk; the route matches modal_inference.py
+
+        Yields:
+            The roast text
+        """
+        if image_id not in self.image_cache:
+            raise ValueError(f"Image ID {image_id} not found in cache")
+
+        yield self._generate(
+            self.image_cache[image_id]["image"],
+            1,
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k,
+            max_new_tokens=max_new_tokens
+        )[0]
+
+# ==========================================
+# REST API Endpoints (RunPod-compatible, see roast_api.py)
+# ==========================================
+
+@app.function()
+@modal.asgi_app()
+def api():
+    """Single web app serving every route through one shared RoastModel handle"""
+    return make_api(RoastModel)
@@ -0,0 +1,212 @@
+"""
+Prompt and REST API shared by the Modal roast backends
+
+modal_inference.py (transformers) and modal_vllm_inference.py (vLLM) both
+import this module, so the prompt the model sees and the routes clients call
+cannot drift between them. Each backend ships it into its image with
+add_local_python_source("roast_api").
+"""
+
+# ==========================================
+# System Message & Prompt (MATCHES TRAINING DATA)
+# ==========================================
+
+SYSTEM_MESSAGE = """You are a sharp-witted roast comedian performing in a consensual roast battle inspired by Reddit's r/RoastMe. Generate one savage, hilarious roast based ONLY on what you see in the photo.
+
+Rules:
+- Attack specific visual details: appearance, expression, outfit, setting
+- Use clever comparisons and pop culture references  
+- Keep it punchy: 1-2 sentences, under 100 characters ideal
+- Be brutally funny - no holding back
+- No hedging, no apologies, just pure roast
+
+Deliver a devastating one-liner like a standup comedian."""
+
+USER_PROMPT = "Roast this person based on their appearance."
+
+MAX_CANDIDATES = 8  # Upper bound on numCandidates per request (batch size on the GPU)
+
+def build_messages(image) -> list:
+    """Build the chat messages for a single roast request"""
+    return [
+        {
+            "role": "system",
+            "content": [{"type": "text", "text": SYSTEM_MESSAGE}]
+        },
+        {
+            "role": "user",
+            "content": [
+                {"type": "image", "image": image},
+                {"type": "text", "text": USER_PROMPT}
+            ]
+        }
+    ]
+
+# ==========================================
+# REST API Endpoints (RunPod-compatible)
+# ==========================================
+
+def make_api(model_cls):
+    """
+    Build the single web app serving every route through one shared model handle
+
+    model_cls is a Modal class exposing upload_image, roast_image,
+    generate_batch and generate_stream.
+
+    POST /upload
+    Body: multipart/form-data with a "file" part (preferred: raw bytes,
+          no base64 inflation) or JSON {"imageBase64": "..."}
+    Returns: {"imageId": "uuid"}
+
+    POST /generate-batch
+    Body: {"imageId": "uuid", "numCandidates": 3}  (1..MAX_CANDIDATES)
+    Returns: {"candidates": [...], "count": 3}
+
+    POST /generate (legacy)
+    Body: {"imageId": "uuid"}
+    Returns: {"roast": "..."}
+
+    POST /generate-stream
+    Body: {"imageId": "uuid"}
+    Returns: text/event-stream of {"text": "..."} events, then [DONE]
+
+    POST /roast
+    Body: same as /upload, plus "numCandidates" (form field or JSON key)
+    Returns: same as /generate-batch
+    """
+    import asyncio
+    import json
+    import pybase64
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.responses import StreamingResponse
+    from pydantic import BaseModel
+
+    web_app = FastAPI()
+    model = model_cls()
+
+    class GenerateBatchRequest(BaseModel):
+        imageId: str
+        numCandidates: int = 3
+
+    class GenerateRequest(BaseModel):
+        imageId: str
+
+    async def read_image(request: Request) -> tuple:
+        """Return (image_bytes, fields) from a multipart or JSON image request"""
+        content_type = request.headers.get("content-type", "")
+
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload_file = form.get("file")
+            if upload_file is None or isinstance(upload_file, str):
+                raise HTTPException(status_code=400, detail="Missing file")
+            image_bytes = await upload_file.read()
+            fields = form
+        else:
+            body = await request.json()
+            image_base64 = body.get("imageBase64")
+            if not image_base64:
+                raise HTTPException(status_code=400, detail="Missing imageBase64")
+            # SIMD-accelerated decode for legacy base64 clients, off the
+            # event loop so concurrent uploads are not serialized behind it
+            image_bytes = await asyncio.to_thread(pybase64.b64decode, image_base64)
+            fields = body
+
+        if not image_bytes:
+            raise HTTPException(status_code=400, detail="Empty image")
+
+        return image_bytes, fields
+
+    def check_num_candidates(num_candidates: int):
+        """Reject candidate counts the backends should not be asked to batch"""
+        if not 1 <= num_candidates <= MAX_CANDIDATES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"numCandidates must be between 1 and {MAX_CANDIDATES}"
+            )
+
+    @web_app.post("/upload")
+    async def handle_upload(request: Request):
+        image_bytes, _ = await read_image(request)
+
+        image_id = await model.upload_image.remote.aio(image_bytes)
+
+        return {"imageId": image_id}
+
+    @web_app.post("/roast")
+    async def handle_roast(request: Request):
+        image_bytes, fields = await read_image(request)
+
+        try:
+            num_candidates = int(fields.get("numCandidates", 3))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="numCandidates must be an integer")
+        check_num_candidates(num_candidates)
+
+        try:
+            return await model.roast_image.remote.aio(
+                image_bytes,
+                num_candidates=num_candidates
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
+
+    @web_app.post("/generate-batch")
+    async def handle_generate_batch(request: GenerateBatchRequest):
+        if not request.imageId:
+            raise HTTPException(status_code=400, detail="Missing imageId")
+        check_num_candidates(request.numCandidates)
+
+        try:
+            result = await model.generate_batch.remote.aio(
+                image_id=request.imageId,
+                num_candidates=request.numCandidates
+            )
+            return result
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
+
+    @web_app.post("/generate")
+    async def handle_generate(request: GenerateRequest):
+        if not request.imageId:
+            raise HTTPException(status_code=400, detail="Missing imageId")
+
+        try:
+            result = await model.generate_batch.remote.aio(
+                image_id=request.imageId,
+                num_candidates=1
+            )
+            return {
+                "roast": result["candidates"][0],
+                "inference_time_seconds": result["inference_time_seconds"],
+                "model": result["model"]
+            }
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
+
+    @web_app.post("/generate-stream")
+    async def handle_generate_stream(request: GenerateRequest):
+        if not request.imageId:
+            raise HTTPException(status_code=400, detail="Missing imageId")
+
+        async def events():
+            try:
+                async for chunk in model.generate_stream.remote_gen.aio(
+                    image_id=request.imageId
+                ):
+                    yield f"data: {json.dumps({'text': chunk})}\n\n"
+            except ValueError as e:
+                yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            except Exception as e:
+                # Any remote failure is reported in-stream too, so clients can
+                # tell it from a dropped connection; [DONE] always follows
+                yield f"data: {json.dumps({'error': 'Generation failed: ' + str(e)})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return web_app
@@ -0,0 +1,270 @@
+"""
+tools/_clean_core.py
+
+Roast cleaning and visual-quality filtering shared by clean_and_convert.py
+and filter_hf_with_visual_criteria.py, so both apply the same rules
+"""
+
+import re
+from typing import Optional, Tuple
+
+# RE2 and Aho-Corasick are C extensions without PyPy wheels; without them
+# the same checks fall back to plain re / substring tests (same results)
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Cleaning patterns, compiled once at import. Steps whose matches can span
+# other artifacts (to end of line, across brackets) keep their own pass;
+# the token-level steps 3-7 are fused into one alternation so each roast
+# is scanned once for all of them. Alternatives keep the original step order.
+#
+# Step 1 only cuts from a literal marker to the end of the line, so ASCII
+# roasts use str.find on the lowercased text; the regexes are kept for
+# non-ASCII text, where lower() can change the length and shift indices.
+_NOTE_MARKERS = ('edit:',) + tuple(
+    f'{thanks} for the {award}'
+    for thanks in ('thank', 'thanks')
+    for award in ('gold', 'silver', 'platinum', 'award')
+)
+_THANK_YOU_MARKERS = ('thank you kind stranger', 'thank you for the gold')
+_NOTE_RE = re.compile(
+    r'Edit:.*$|Thanks? for the (?:gold|silver|platinum|award).*$',
+    re.IGNORECASE | re.MULTILINE
+)
+_THANK_YOU_RE = re.compile(r'Thank you (kind stranger|for the gold).*$', re.IGNORECASE)
+_EMBED_RE = re.compile(r'!\[.*?\]\(.*?\)|\[gif\]\(.*?\)')
+_CLEAN_RE = re.compile(
+    r'(?P<link>\[(?P<link_text>[^\]]*)\]\([^\)]*\))'
+    r'|(?P<url>https?://\S+)'
+    r'|(?P<reddit>[ru]/(?:(?!https?://)\w)+)'
+    r'|(?P<emoji>[\U00010000-\U0010ffff])'
+    r'|(?P<hashtag>#\w+)'
+    r'|(?P<emphasis>[*_]+)'
+    r'|(?P<header>#{1,6}\s)'
+)
+# Every _CLEAN_RE alternative needs one of these characters (or a non-ASCII
+# emoji), so roasts without them skip the scan entirely
+_CLEAN_TRIGGERS = ('/', '#', '[', '*', '_')
+
+# BMP symbols/dingbats (U+2600-U+27BF) are dropped with str.translate;
+# astral-plane emojis stay in _CLEAN_RE, a table for them would be huge
+_SYMBOL_TABLE = dict.fromkeys(range(0x2600, 0x27C0))
+# Two passes, brackets then parens: an alternation would miss nested
+# empties such as "([])", whose parens are only empty after the first pass
+_EMPTY_SQUARE_RE = re.compile(r'\[\s*\]')
+_EMPTY_PARENS_RE = re.compile(r'\(\s*\)')
+_EXCESS_BANG_RE = re.compile(r'([!?]){3,}')
+_EXCESS_DOTS_RE = re.compile(r'\.{3,}')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Quality patterns (run against lowercased text). Each list is joined into
+# one alternation so a single search answers "does any pattern match?".
+# These are match-only checks, so ASCII text goes through RE2 (a linear-time
+# DFA, no backtracking on the `.+` comparisons); RE2's \b and \w are
+# ASCII-only, so other text falls back to `re` to keep Unicode semantics.
+def _compile_any(patterns: Tuple[str, ...]) -> Tuple["re2._Regexp", re.Pattern]:
+    """Compile an alternation of patterns for both RE2 and re"""
+    pattern = '|'.join(patterns)
+    unicode_re = re.compile(pattern)
+    return (re2.compile(pattern) if re2 is not None else unicode_re), unicode_re
+
+def _search_any(compiled: Tuple["re2._Regexp", re.Pattern], text: str) -> bool:
+    """True if any pattern of a _compile_any alternation matches text"""
+    ascii_re, unicode_re = compiled
+    return (ascii_re if text.isascii() else unicode_re).search(text) is not None
+
+_REJECT_RE = _compile_any((
+    r'\bkarma\b', r'\bsubscriber[s]?\b', r'\bharvard\b', r'\bcollege\b',
+    r'\bi bet you\b', r'\byou probably\b', r'\bi heard\b',
+    r'\bglad\b', r'\bcongrat[s]?\b', r'\bgood job\b', r'\bnice\b',
+    r'\bperfectly valid\b', r'\bwe care\b',
+    r'\bthis time\b', r'\bupdated\b', r'\bagain\b', r'\bstill\b',
+    r'\bvirgin\b', r'\bgirlfriend\b', r'\bboyfriend\b',
+    r'\bjob\b', r'\bmoney\b', r'\brich\b', r'\bpoor\b'
+))
+
+_VISUAL_COMPARISON_RE = _compile_any((
+    r'\blook like\b', r'\blooks like\b', r'\blooking like\b',
+    r'\bremind[s]? me of\b', r'\bresemble[s]?\b',
+    r'\bif .+ had a baby\b', r'\bif .+ and .+ had\b',
+    r'\bknockoff\b', r'\bdollar store\b', r'\bwish\.com\b'
+))
+
+_PHYSICAL_FEATURES = (
+    'face', 'forehead', 'fivehead', 'hair', 'hairline', 'receding',
+    'eye', 'eyes', 'nose', 'mouth', 'teeth', 'smile', 'smiling',
+    'chin', 'eyebrow', 'eyebrows', 'beard', 'mustache',
+    'head', 'neck', 'cheek', 'cheeks', 'jaw', 'lips',
+    'body', 'arm', 'arms', 'hand', 'hands'
+)
+
+# One Aho-Corasick pass finds every feature occurrence, including ones
+# nested in longer words ("eye" in "eyes", "head" in "forehead")
+if ahocorasick is not None:
+    _PHYSICAL_FEATURES_AC = ahocorasick.Automaton()
+    for _feature in _PHYSICAL_FEATURES:
+        _PHYSICAL_FEATURES_AC.add_word(_feature, _feature)
+    _PHYSICAL_FEATURES_AC.make_automaton()
+    
+    def _count_features(text_lower: str) -> int:
+        """Number of distinct physical-feature keywords in text_lower"""
+        return len({f for _, f in _PHYSICAL_FEATURES_AC.iter(text_lower)})
+else:
+    def _count_features(text_lower: str) -> int:
+        """Number of distinct physical-feature keywords in text_lower"""
+        return sum(1 for f in _PHYSICAL_FEATURES if f in text_lower)
+
+# Leftover artifacts are plain literals (no \b, no wildcards), so substring
+# tests answer exactly what a regex would, without any regex engine
+# ("subreddit" is covered by "reddit")
+_BAD_SUBSTRINGS = ('http', 'www.', '.com', 'imgur', 'reddit', 'upvote')
+
+def _clean_match(match: re.Match) -> str:
+    """Replacement for _CLEAN_RE: keep (cleaned) link text, drop everything else"""
+    if match.lastgroup == 'link':
+        return _CLEAN_RE.sub(_clean_match, match.group('link_text'))
+    return ''
+
+def _find_marker(text_lower: str, markers: Tuple[str, ...]) -> int:
+    """Index of the earliest marker in text_lower, or -1"""
+    found = [i for i in (text_lower.find(m) for m in markers) if i >= 0]
+    return min(found) if found else -1
+
+def _strip_notes(roast_text: str) -> str:
+    """Cut Edit:/award notes to the end of their line (same as _NOTE_RE + _THANK_YOU_RE)"""
+    text_lower = roast_text.lower()
+    
+    if not roast_text.isascii():
+        # Guards skip the IGNORECASE regexes on most roasts. They avoid i/k/s,
+        # which IGNORECASE also matches to U+0130/U+0131/U+212A/U+017F
+        if ':' in roast_text or 'for the' in text_lower:
+            roast_text = _NOTE_RE.sub('', roast_text)
+        if 'you' in text_lower:
+            roast_text = _THANK_YOU_RE.sub('', roast_text)
+        return roast_text
+    
+    if 'edit:' in text_lower or 'for the ' in text_lower:
+        # Edit/award notes are cut on every line
+        lines = roast_text.split('\n')
+        for i, line_lower in enumerate(text_lower.split('\n')):
+            idx = _find_marker(line_lower, _NOTE_MARKERS)
+            if idx >= 0:
+                lines[i] = lines[i][:idx]
+        roast_text = '\n'.join(lines)
+        text_lower = roast_text.lower()
+    
+    if 'thank you ' in text_lower:
+        # Without MULTILINE, `.*$` only reaches the end of the last line
+        # (before one trailing newline), so only that line is checked
+        end = len(roast_text) - 1 if roast_text.endswith('\n') else len(roast_text)
+        start = roast_text.rfind('\n', 0, end) + 1
+        idx = _find_marker(text_lower[start:end], _THANK_YOU_MARKERS)
+        if idx >= 0:
+            roast_text = roast_text[:start + idx] + roast_text[end:]
+    
+    return roast_text
+
+def ultra_clean_roast(roast_text: str) -> Optional[str]:
+    """
+    Ultra-aggressive cleaning - return None if can't be salvaged
+    Now with better artifact removal
+    """
+    
+    # Only the length is needed for the final ratio check, so the original
+    # string can be freed as soon as roast_text is rebound
+    orig_len = len(roast_text)
+    
+    # 1. Remove Edit/Award acknowledgments (very common)
+    roast_text = _strip_notes(roast_text)
+    
+    # Steps 2 and 8-11 are guarded by a substring each of their matches
+    # must contain, so the common clean roast skips those regex passes
+    
+    # 2. Remove GIF/image references
+    if '[' in roast_text:
+        roast_text = _EMBED_RE.sub('', roast_text)
+    
+    # 3-7. Remove links (keeping their text), URLs, Reddit references,
+    # emojis, hashtags and markdown formatting in a single pass
+    if not roast_text.isascii() or any(c in roast_text for c in _CLEAN_TRIGGERS):
+        roast_text = _CLEAN_RE.sub(_clean_match, roast_text)
+        roast_text = roast_text.translate(_SYMBOL_TABLE)
+    
+    # 8. Clean up brackets/parentheses (after their contents were removed)
+    if '[' in roast_text:
+        roast_text = _EMPTY_SQUARE_RE.sub('', roast_text)
+    if '(' in roast_text:
+        roast_text = _EMPTY_PARENS_RE.sub('', roast_text)
+    
+    # 9. Remove excessive punctuation
+    if '!' in roast_text or '?' in roast_text:
+        roast_text = _EXCESS_BANG_RE.sub(r'\1\1', roast_text)  # !!! -> !!
+    if '...' in roast_text:
+        roast_text = _EXCESS_DOTS_RE.sub('...', roast_text)
+    
+    # 10. Clean whitespace: \s+ also covers newlines, so one pass removes
+    # ALL newlines and collapses multiple spaces
+    roast_text = _WHITESPACE_RE.sub(' ', roast_text)
+    roast_text = roast_text.strip()
+    
+    # 11. Remove trailing artifacts (the text is stripped, so a trailing
+    # ellipsis is exactly the last three characters)
+    if roast_text.endswith('...'):
+        roast_text = roast_text[:-3].strip()
+    
+    # 12. Final cleanup - remove if too much was removed
+    if not roast_text or len(roast_text) < 20:
+        return None
+    
+    # Check if we removed too much (sign of heavy artifacts)
+    if len(roast_text) < orig_len * 0.3:
+        return None
+    
+    return roast_text
+
+def is_high_quality(roast_text: str, roast_score: Optional[int] = None) -> Tuple[bool, str]:
+    """
+    STRICT quality check focused on visual grounding
+    Pass roast_score=None to skip the score check (HF data has no scores)
+    Returns: (is_valid, reason)
+    """
+    # Checks run cheapest-first: the score needs no string work at all,
+    # and the regex checks only see roasts that passed both guards
+    
+    # 1. Score check - HIGHER THRESHOLD
+    if roast_score is not None and roast_score < 100:
+        return False, "low_score"
+    
+    # 2. Length check - STRICT
+    if len(roast_text) < 25:
+        return False, "too_short"
+    if len(roast_text) > 150:
+        return False, "too_long"
+    
+    text_lower = roast_text.lower()
+    
+    # 3. AUTO-REJECT patterns (non-visual content)
+    if _search_any(_REJECT_RE, text_lower):
+        return False, "non_visual_content"
+    
+    # 4. MUST have visual comparison OR multiple physical features
+    # Need EITHER comparison OR 2+ features; physical features (distinct
+    # keywords, as in a per-keyword `in` test) are only counted when there
+    # is no comparison
+    if (not _search_any(_VISUAL_COMPARISON_RE, text_lower)
+            and _count_features(text_lower) < 2):
+        return False, "not_visual_enough"
+    
+    # 5. Check for remaining artifacts
+    for pattern in _BAD_SUBSTRINGS:
+        if pattern in text_lower:
+            return False, "has_artifact"
+    
+    return True, "valid"
@@ -1,152 +1,130 @@
 """
 Ultra-aggressive cleaning + conversion to LLaVA format v4
 Strict visual grounding focus + system prompts + train/val split
+
+Also runs under PyPy (`pypy3 tools/clean_and_convert.py`): the cleaning loop
+is pure string/regex work its JIT speeds up, and the C-extension helpers
+(orjson, RE2, Aho-Corasick) fall back to stdlib equivalents when missing.
 """
 
-import json
-import re
+import os
 from pathlib import Path
-from collections import Counter
-from typing import Optional, Tuple
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 
-def ultra_clean_roast(roast_text: str) -> Optional[str]:
-    """
-    Ultra-aggressive cleaning - return None if can't be salvaged
-    Now with better artifact removal
+from _clean_core import ultra_clean_roast, is_high_quality
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    import json
+    _json_loads = json.loads
+    
+    def _json_dumps(obj) -> bytes:
+        """Compact UTF-8 JSON, like orjson.dumps"""
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
+def _iter_line_chunks(f, chunk_size: int) -> Iterator[List[bytes]]:
+    """Yield lists of up to chunk_size non-blank lines from a binary file"""
+    chunk = []
+    for line in f:
+        if not line.strip():
+            continue
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _clean_lines(lines: List[bytes]) -> Tuple[List[Tuple[str, str, str]], Counter, int, int]:
     """
+    Clean and filter one chunk of raw JSONL lines (runs in a worker process)
+    Returns: (kept_records, stats, num_samples, total_raw_roasts)
     
-    original = roast_text
-    
-    # 1. Remove Edit/Award acknowledgments (very common)
-    roast_text = re.sub(r'Edit:.*$', '', roast_text, flags=re.IGNORECASE | re.MULTILINE)
-    roast_text = re.sub(r'EDIT:.*$', '', roast_text, flags=re.IGNORECASE | re.MULTILINE)
-    roast_text = re.sub(r'Thanks? for the (gold|silver|platinum|award).*$', '', roast_text, flags=re.IGNORECASE | re.MULTILINE)
-    roast_text = re.sub(r'Thank you (kind stranger|for the gold).*$', '', roast_text, flags=re.IGNORECASE)
-    
-    # 2. Remove GIF/image references
-    roast_text = re.sub(r'!\[gif\]\(.*?\)', '', roast_text)
-    roast_text = re.sub(r'!\[.*?\]\(.*?\)', '', roast_text)
-    roast_text = re.sub(r'\[gif\]\(.*?\)', '', roast_text)
-    
-    # 3. Remove ALL markdown/links
-    roast_text = re.sub(r'\[([^\]]*)\]\([^\)]*\)', r'\1', roast_text)  # [text](url) -> text
-    roast_text = re.sub(r'https?://\S+', '', roast_text)  # Remove URLs
-    
-    # 4. Remove Reddit references
-    roast_text = re.sub(r'r/\w+', '', roast_text)
-    roast_text = re.sub(r'u/\w+', '', roast_text)
-    
-    # 5. Remove emojis (ALL of them)
-    roast_text = re.sub(r'[\U00010000-\U0010ffff]', '', roast_text, flags=re.UNICODE)
-    roast_text = re.sub(r'[\u2600-\u27BF]', '', roast_text)
-    roast_text = re.sub(r'[\U0001F300-\U0001F9FF]', '', roast_text)
-    
-    # 6. Remove hashtags
-    roast_text = re.sub(r'#\w+', '', roast_text)
-    
-    # 7. Remove markdown formatting
-    roast_text = re.sub(r'[*_]{1,}', '', roast_text)
-    roast_text = re.sub(r'#{1,6}\s', '', roast_text)
-    
-    # 8. Clean up brackets/parentheses
-    roast_text = re.sub(r'\[\s*\]', '', roast_text)
-    roast_text = re.sub(r'\(\s*\)', '', roast_text)
-    
-    # 9. Remove excessive punctuation
-    roast_text = re.sub(r'([!?]){3,}', r'\1\1', roast_text)  # !!! -> !!
-    roast_text = re.sub(r'\.{3,}', '...', roast_text)
-    
-    # 10. Clean whitespace
-    roast_text = re.sub(r'\n+', ' ', roast_text)  # Remove ALL newlines
-    roast_text = re.sub(r'\s+', ' ', roast_text)  # Collapse multiple spaces
-    roast_text = roast_text.strip()
-    
-    # 11. Remove trailing artifacts
-    roast_text = re.sub(r'\.\.\.\s*$', '', roast_text)
-    roast_text = roast_text.strip()
-    
-    # 12. Final cleanup - remove if too much was removed
-    if not roast_text or len(roast_text) < 20:
-        return None
+    Kept records are compact (id, image, roast) tuples; the nested LLaVA
+    dicts are only built by _write_llava_json when they are serialized.
+    """
+    kept = []
+    stats = Counter()
+    total_raw_roasts = 0
     
-    # Check if we removed too much (sign of heavy artifacts)
-    if len(roast_text) < len(original) * 0.3:
-        return None
+    for line in lines:
+        sample = _json_loads(line)
+        total_raw_roasts += len(sample['roasts'])
+        
+        for roast_idx, (roast_text, roast_score) in enumerate(zip(sample['roasts'], sample['roast_scores'])):
+            stats['total'] += 1
+            
+            # Clean
+            cleaned = ultra_clean_roast(roast_text)
+            
+            if not cleaned:
+                stats['cleaning_failed'] += 1
+                continue
+            
+            # Quality check
+            is_valid, reason = is_high_quality(cleaned, roast_score)
+            
+            if not is_valid:
+                stats[reason] += 1
+                continue
+            
+            kept.append((f"{sample['id']}_r{roast_idx}", sample['image_filename'], cleaned))
+            
+            stats['kept'] += 1
     
-    return roast_text
+    return kept, stats, len(lines), total_raw_roasts
 
-def is_high_quality(roast_text: str, roast_score: int) -> Tuple[bool, str]:
-    """
-    STRICT quality check focused on visual grounding
-    Returns: (is_valid, reason)
+# Identical in every sample, so one dict is shared (never mutated)
+_HUMAN_TURN = {
+    "from": "human",
+    "value": "<image>\nRoast this person based on their appearance."
+}
+
+def _llava_sample(record_id: str, image: str, roast: str) -> dict:
+    """Convert one kept (id, image, roast) record to LLaVA format"""
+    return {
+        "id": record_id,
+        "image": image,
+        "conversations": [
+            _HUMAN_TURN,
+            {
+                "from": "gpt",
+                "value": roast
+            }
+        ]
+    }
+
+def _write_llava_json(path: Path, records: List[Tuple[str, str, str]], batch_size: int = 1000):
     """
-    text_lower = roast_text.lower()
-    
-    # 1. Length check - STRICT
-    if len(roast_text) < 25:
-        return False, "too_short"
-    if len(roast_text) > 150:
-        return False, "too_long"
-    
-    # 2. Score check - HIGHER THRESHOLD
-    if roast_score < 100:
-        return False, "low_score"
-    
-    # 3. AUTO-REJECT patterns (non-visual content)
-    reject_patterns = [
-        r'\bkarma\b', r'\bsubscriber[s]?\b', r'\bharvard\b', r'\bcollege\b',
-        r'\bi bet you\b', r'\byou probably\b', r'\bi heard\b',
-        r'\bglad\b', r'\bcongrat[s]?\b', r'\bgood job\b', r'\bnice\b',
-        r'\bperfectly valid\b', r'\bwe care\b',
-        r'\bthis time\b', r'\bupdated\b', r'\bagain\b', r'\bstill\b',
-        r'\bvirgin\b', r'\bgirlfriend\b', r'\bboyfriend\b',
-        r'\bjob\b', r'\bmoney\b', r'\brich\b', r'\bpoor\b'
-    ]
-    
-    for pattern in reject_patterns:
-        if re.search(pattern, text_lower):
-            return False, "non_visual_content"
-    
-    # 4. MUST have visual comparison OR multiple physical features
-    visual_comparisons = [
-        r'\blook like\b', r'\blooks like\b', r'\blooking like\b',
-        r'\bremind[s]? me of\b', r'\bresemble[s]?\b',
-        r'\bif .+ had a baby\b', r'\bif .+ and .+ had\b',
-        r'\bknockoff\b', r'\bdollar store\b', r'\bwish\.com\b'
-    ]
-    
-    has_comparison = any(re.search(pattern, text_lower) for pattern in visual_comparisons)
-    
-    # Physical features
-    physical_features = [
-        'face', 'forehead', 'fivehead', 'hair', 'hairline', 'receding',
-        'eye', 'eyes', 'nose', 'mouth', 'teeth', 'smile', 'smiling',
-        'chin', 'eyebrow', 'eyebrows', 'beard', 'mustache',
-        'head', 'neck', 'cheek', 'cheeks', 'jaw', 'lips',
-        'body', 'arm', 'arms', 'hand', 'hands'
-    ]
-    
-    feature_count = sum(1 for f in physical_features if f in text_lower)
+    Stream records to path as a LLaVA JSON array, one compact JSON sample per line
     
-    # Need EITHER comparison OR 2+ features
-    if not has_comparison and feature_count < 2:
-        return False, "not_visual_enough"
-    
-    # 5. Check for remaining artifacts
-    bad_patterns = [
-        r'http', r'www\.', r'\.com', r'imgur', r'reddit',
-        r'subreddit', r'upvote'
-    ]
-    
-    for pattern in bad_patterns:
-        if re.search(pattern, text_lower):
-            return False, "has_artifact"
-    
-    return True, "valid"
+    Batches are serialized here while a writer thread does the file I/O
+    (which releases the GIL); at most two batches wait to be written.
+    """
+    with open(path, 'wb') as f, ThreadPoolExecutor(max_workers=1) as writer:
+        pending = deque()
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            chunk = b',\n'.join(_json_dumps(_llava_sample(*record)) for record in batch)
+            pending.append(writer.submit(f.write, (b'[\n' if start == 0 else b',\n') + chunk))
+            if len(pending) >= 2:
+                pending.popleft().result()
+        
+        while pending:
+            pending.popleft().result()
+        
+        f.write(b'\n]\n' if records else b'[]\n')
 
 def clean_and_convert(
     input_file: str = "data/raw/training_data.jsonl",
-    output_file: str = "data/llava_format/train.json"
+    output_file: str = "data/llava_format/train.json",
+    workers: Optional[int] = None,
+    chunk_size: int = 1000
 ):
     """Clean and convert to LLaVA format with strict visual filtering"""
     
@@ -166,77 +144,58 @@ Rules:
 
 Deliver a devastating one-liner like a standup comedian."""
     
-    # Load raw data
-    samples = []
-    with open(input_file) as f:
-        for line in f:
-            samples.append(json.loads(line))
-    
-    print(f"Raw samples: {len(samples)}")
-    total_raw_roasts = sum(len(s['roasts']) for s in samples)
-    print(f"Raw roasts: {total_raw_roasts}\n")
-    
-    # Clean and filter
+    # Stream raw data in chunks of lines and clean them in worker processes.
+    # Results are consumed in submission order so the output (and the seeded
+    # shuffle below) is identical to a sequential run; at most
+    # 2 * workers chunks are in flight at once to bound memory.
     llava_data = []
     stats = Counter()
+    num_samples = 0
+    total_raw_roasts = 0
+    
+    workers = workers or os.cpu_count() or 1
+    with open(input_file, 'rb') as f, ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for lines in _iter_line_chunks(f, chunk_size):
+            pending.append(executor.submit(_clean_lines, lines))
+            if len(pending) >= 2 * workers:
+                records, chunk_stats, chunk_samples, chunk_roasts = pending.popleft().result()
+                llava_data.extend(records)
+                stats.update(chunk_stats)
+                num_samples += chunk_samples
+                total_raw_roasts += chunk_roasts
+        
+        while pending:
+            records, chunk_stats, chunk_samples, chunk_roasts = pending.popleft().result()
+            llava_data.extend(records)
+            stats.update(chunk_stats)
+            num_samples += chunk_samples
+            total_raw_roasts += chunk_roasts
+    
+    print(f"Raw samples: {num_samples}")
+    print(f"Raw roasts: {total_raw_roasts}\n")
     
-    for sample in samples:
-        for roast_idx, (roast_text, roast_score) in enumerate(zip(sample['roasts'], sample['roast_scores'])):
-            stats['total'] += 1
-            
-            # Clean
-            cleaned = ultra_clean_roast(roast_text)
-            
-            if not cleaned:
-                stats['cleaning_failed'] += 1
-                continue
-            
-            # Quality check
-            is_valid, reason = is_high_quality(cleaned, roast_score)
-            
-            if not is_valid:
-                stats[reason] += 1
-                continue
-            
-            # Convert to LLaVA format with system prompt
-            llava_data.append({
-                "id": f"{sample['id']}_r{roast_idx}",
-                "image": sample['image_filename'],
-                "conversations": [
-                    {
-                        "from": "human",
-                        "value": "<image>\nRoast this person based on their appearance."
-                    },
-                    {
-                        "from": "gpt",
-                        "value": cleaned
-                    }
-                ]
-            })
-            
-            stats['kept'] += 1
-    
-    # Split train/val
+    # Split train/val: in-place shuffle, then move the val tail out so the
+    # train half is the original list rather than a copy
     import random
-    random.seed(42)
-    random.shuffle(llava_data)
+    rng = random.Random(42)
+    rng.shuffle(llava_data)
     
     val_ratio = 0.1
     split_idx = int(len(llava_data) * (1 - val_ratio))
-    train_data = llava_data[:split_idx]
     val_data = llava_data[split_idx:]
+    del llava_data[split_idx:]
+    train_data = llava_data
     
     # Save train
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(train_data, f, indent=2, ensure_ascii=False)
+    _write_llava_json(output_path, train_data)
     
     # Save val
     val_path = output_path.parent / "val.json"
-    with open(val_path, 'w', encoding='utf-8') as f:
-        json.dump(val_data, f, indent=2, ensure_ascii=False)
+    _write_llava_json(val_path, val_data)
     
     # Stats
     print(f"\n{'='*70}")
@@ -265,8 +224,7 @@ Deliver a devastating one-liner like a standup comedian."""
     print(f"{'='*70}\n")
     
     sample_count = min(15, len(train_data))
-    for i, sample in enumerate(random.sample(train_data, sample_count), 1):
-        roast = sample['conversations'][1]['value']
+    for i, (_, _, roast) in enumerate(rng.sample(train_data, sample_count), 1):
         print(f"{i}. {roast}\n")
     
     print(f"{'='*70}\n")
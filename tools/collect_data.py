@@ -3,20 +3,35 @@ Collect r/RoastMe data with automatic image normalization
 """
 
 import praw
-import json
-import time
+import orjson
+import re
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 import os
 from tqdm import tqdm
 from PIL import Image
 import io
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 load_dotenv()
 
+# Image-hosting URLs: direct .jpg/.jpeg/.png links, Reddit's image CDN, imgur
+_IMAGE_URL_RE = re.compile(r'\.jpe?g|\.png|i\.redd\.it|imgur', re.IGNORECASE)
+
+# Comments mentioning removal/deletion (covers the [removed]/[deleted] markers)
+_REMOVED_RE = re.compile(r'removed|deleted', re.IGNORECASE)
+
+def _roast_hash(text: str) -> str:
+    """Short stable hash of a roast, ignoring case and surrounding whitespace"""
+    return hashlib.blake2b(text.strip().lower().encode(), digest_size=8).hexdigest()
+
 class RoastMeCollector:
     def __init__(self, output_dir: str = "data/raw"):
         print("Initializing Reddit connection...")
@@ -38,24 +53,63 @@ class RoastMeCollector:
         self.images_dir = self.output_dir / "images"
         self.images_dir.mkdir(exist_ok=True)
         
+        # Progress = JSON snapshot (rewritten at tier boundaries) + an
+        # append-only log of IDs processed since, one per line
         self.progress_file = self.output_dir / "collection_progress.json"
-        self.processed_ids = self._load_progress()
+        self.progress_log_file = self.output_dir / "collection_progress.log"
+        self.processed_ids, self.seen_roast_hashes = self._load_progress()
+        self.progress_log = open(self.progress_log_file, "a", buffering=1)
+        
+        # One pooled session for image downloads: keep-alive connections to
+        # the few image hosts (i.redd.it, imgur) are reused across submissions
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'Mozilla/5.0'})
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         
         print(f"Previously processed: {len(self.processed_ids)} submissions")
 
-    def _load_progress(self) -> set:
+    def close(self):
+        """Close pooled HTTP connections and the progress log"""
+        self.session.close()
+        self.progress_log.close()
+
+    def _load_progress(self) -> Tuple[set, set]:
+        """Return (processed submission IDs, hashes of roasts already collected)"""
+        processed_ids = set()
+        seen_roast_hashes = set()
         if self.progress_file.exists():
-            with open(self.progress_file) as f:
-                data = json.load(f)
-                return set(data.get("processed_ids", []))
-        return set()
+            with open(self.progress_file, "rb") as f:
+                data = orjson.loads(f.read())
+                processed_ids.update(data.get("processed_ids", []))
+                seen_roast_hashes.update(data.get("seen_roast_hashes", []))
+        if self.progress_log_file.exists():
+            with open(self.progress_log_file) as f:
+                processed_ids.update(line.strip() for line in f if line.strip())
+        return processed_ids, seen_roast_hashes
+
+    def _mark_processed(self, submission_id: str):
+        """Record one processed submission (O(1) append, no full rewrite)"""
+        self.processed_ids.add(submission_id)
+        self.progress_log.write(submission_id + "\n")
 
     def _save_progress(self):
-        with open(self.progress_file, "w") as f:
-            json.dump({
+        """Snapshot all processed IDs to JSON (atomic rename) and empty the log"""
+        tmp_file = self.progress_file.with_suffix(".json.tmp")
+        with open(tmp_file, "wb") as f:
+            f.write(orjson.dumps({
                 "processed_ids": list(self.processed_ids),
+                "seen_roast_hashes": list(self.seen_roast_hashes),
                 "last_updated": datetime.now().isoformat()
-            }, f, indent=2)
+            }, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_file, self.progress_file)
+        
+        self.progress_log.truncate(0)
 
     def reset_collection(self):
         """Delete all previously collected data"""
@@ -64,8 +118,10 @@ class RoastMeCollector:
         print("="*70)
         
         self.processed_ids = set()
+        self.seen_roast_hashes = set()
         if self.progress_file.exists():
             self.progress_file.unlink()
+        self.progress_log.truncate(0)
         
         if self.images_dir.exists():
             for img in self.images_dir.glob("*"):
@@ -88,23 +144,20 @@ class RoastMeCollector:
         min_score: int = 100, 
         min_comments: int = 20
     ) -> bool:
+        # Cheapest checks first: plain listing fields, the URL regex last
         if submission.id in self.processed_ids:
             return False
         
-        if submission.stickied:
-            return False
-        
-        if not submission.url or not any(ext in submission.url.lower() 
-                                        for ext in ['.jpg', '.jpeg', '.png', 'i.redd.it', 'imgur']):
-            return False
-        
         if submission.score < min_score:
             return False
         
         if submission.num_comments < min_comments:
             return False
         
-        if submission.over_18:
+        if submission.stickied or submission.over_18:
+            return False
+        
+        if not submission.url or _IMAGE_URL_RE.search(submission.url) is None:
             return False
         
         return True
@@ -115,47 +168,84 @@ class RoastMeCollector:
             if 'imgur' in url and not url.endswith(('.jpg', '.jpeg', '.png')):
                 url = url + '.jpg'
             
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(url, headers=headers, timeout=10)
+            # Stream the body straight into PIL; error pages and other
+            # non-image responses are never downloaded
+            with self.session.get(url, timeout=10, stream=True) as response:
+                if response.status_code != 200:
+                    return None
+                if 'image' not in response.headers.get('Content-Type', ''):
+                    return None
+                
+                response.raw.decode_content = True
+                img = Image.open(response.raw)
+                # JPEGs decode at 1/2, 1/4 or 1/8 scale in the IDCT when that
+                # still covers max_size (no-op for other formats)
+                img.draft('RGB', (max_size, max_size))
+                img.load()  # Decode now so the connection returns to the pool
+            
+            # Normalize image inline. Grayscale/CMYK resample directly, so they
+            # are converted after the resize (fewer pixels); palette and alpha
+            # modes are converted first (palette only resamples with NEAREST)
+            if img.mode not in ('RGB', 'L', 'CMYK'):
+                img = img.convert('RGB')
+            
+            # Resize if needed (maintain aspect ratio, long side = max_size)
+            width, height = img.size
+            scale = max_size / max(width, height)
+            if scale < 1.0:
+                new_size = (
+                    max_size if width >= height else int(width * scale),
+                    max_size if height > width else int(height * scale)
+                )
+                # reducing_gap: cheap BOX reduce first, LANCZOS only for the
+                # last <3x, which looks the same after JPEG encoding
+                img = img.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            
+            # Save to bytes as progressive 4:2:0 JPEG (progressive coding
+            # already builds optimized Huffman tables, so no optimize pass)
+            output = io.BytesIO()
+            img.save(output, 'JPEG', quality=quality, progressive=True, subsampling=2)
+            return output.getvalue()
             
-            if response.status_code == 200:
-                content_type = response.headers.get('Content-Type', '')
-                if 'image' in content_type:
-                    # Normalize image inline
-                    img = Image.open(io.BytesIO(response.content))
-                    
-                    # Convert to RGB if needed
-                    if img.mode != 'RGB':
-                        img = img.convert('RGB')
-                    
-                    # Resize if needed (maintain aspect ratio)
-                    width, height = img.size
-                    if width > max_size or height > max_size:
-                        if width > height:
-                            new_width = max_size
-                            new_height = int(height * (max_size / width))
-                        else:
-                            new_height = max_size
-                            new_width = int(width * (max_size / height))
-                        
-                        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    
-                    # Save to bytes as optimized JPEG
-                    output = io.BytesIO()
-                    img.save(output, 'JPEG', quality=quality, optimize=True, progressive=True)
-                    return output.getvalue()
-                    
         except Exception as e:
             print(f"  ⚠️  Image download/normalization error: {e}")
         return None
 
+    def _iter_downloads(self, submissions: List, workers: int = 8):
+        """
+        Yield (submission, image_bytes) in order, downloading ahead on a thread pool
+        
+        At most 2 * workers downloads are in flight or waiting, so images
+        never pile up in memory while comments are fetched serially.
+        """
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for submission in submissions:
+                pending.append((submission, executor.submit(self.download_image, submission.url)))
+                if len(pending) >= 2 * workers:
+                    submission, future = pending.popleft()
+                    yield submission, future.result()
+            
+            while pending:
+                submission, future = pending.popleft()
+                yield submission, future.result()
+
     def extract_top_roasts(
         self, 
         submission, 
         min_score: int = 50,
         max_roasts: int = 15
     ) -> List[Dict]:
-        """Extract roasts"""
+        """
+        Extract roasts
+        
+        Copypasta already collected from another submission (same text up to
+        case/whitespace) is skipped; collect_tier records the hashes of the
+        roasts it keeps.
+        """
         try:
             submission.comment_sort = "top"
             submission.comments.replace_more(limit=0)
@@ -164,26 +254,33 @@ class RoastMeCollector:
             return []
         
         roasts = []
+        hashes = set()
         
         for comment in submission.comments:
-            if comment.score < min_score:
+            body = comment.body
+            if len(body) < 20 or len(body) > 400:
                 continue
             
-            if len(comment.body) < 20 or len(comment.body) > 400:
+            if comment.score < min_score:
                 continue
             
             if comment.distinguished:
                 continue
             
-            body_lower = comment.body.lower()
-            if any(word in body_lower for word in ['removed', 'deleted', '[removed]', '[deleted]']):
+            if _REMOVED_RE.search(body):
+                continue
+            
+            roast_hash = _roast_hash(body)
+            if roast_hash in self.seen_roast_hashes or roast_hash in hashes:
                 continue
+            hashes.add(roast_hash)
             
             roasts.append({
-                "text": comment.body,
+                "text": body,
                 "score": comment.score,
                 "author": str(comment.author) if comment.author else "[deleted]",
-                "created_utc": comment.created_utc
+                "created_utc": comment.created_utc,
+                "hash": roast_hash
             })
             
             if len(roasts) >= max_roasts:
@@ -199,7 +296,8 @@ class RoastMeCollector:
         min_comment_score: int = 50,
         min_submission_score: int = 100,
         min_comments: int = 20,
-        min_roasts: int = 2
+        min_roasts: int = 2,
+        download_workers: int = 8
     ) -> List[Dict]:
         
         print(f"\n{'='*70}")
@@ -216,28 +314,26 @@ class RoastMeCollector:
             print("Fetching submissions from Reddit...")
             submissions = self.subreddit.top(time_filter=time_filter, limit=limit)
             
-            submissions_list = []
-            print("Loading submission list...")
-            for i, submission in enumerate(submissions):
-                submissions_list.append(submission)
-                if (i + 1) % 100 == 0:
-                    print(f"  Loaded {i + 1} submissions...")
-            
-            print(f"✓ Got {len(submissions_list)} submissions\n")
-            
-            with tqdm(total=len(submissions_list), desc=tier_name) as pbar:
-                for submission in submissions_list:
+            # The listing is consumed lazily: each page is filtered (no
+            # network) and its candidates' images start downloading on the
+            # thread pool right away, instead of waiting for every page.
+            # PRAW itself (pagination, comments) stays on this thread since
+            # it is not thread-safe.
+            def candidates():
+                nonlocal skipped
+                for submission in submissions:
                     pbar.update(1)
-                    
-                    if not self.is_valid_submission(
+                    if self.is_valid_submission(
                         submission, 
                         min_submission_score, 
                         min_comments
                     ):
+                        yield submission
+                    else:
                         skipped += 1
-                        continue
-                    
-                    image_bytes = self.download_image(submission.url)
+            
+            with tqdm(total=limit, desc=tier_name) as pbar:
+                for submission, image_bytes in self._iter_downloads(candidates(), download_workers):
                     if not image_bytes:
                         skipped += 1
                         continue
@@ -269,12 +365,8 @@ class RoastMeCollector:
                         "tier": tier_name
                     })
                     
-                    self.processed_ids.add(submission.id)
-                    
-                    if len(collected_data) % 10 == 0:
-                        self._save_progress()
-                    
-                    time.sleep(0.5)
+                    self._mark_processed(submission.id)
+                    self.seen_roast_hashes.update(r["hash"] for r in roasts)
             
             print(f"\n✓ {tier_name}: {len(collected_data)} collected, {skipped} skipped\n")
             
@@ -364,9 +456,9 @@ class RoastMeCollector:
         """Save with metadata"""
         
         training_file = self.output_dir / "training_data.jsonl"
-        with open(training_file, 'w', encoding='utf-8') as f:
+        with open(training_file, 'wb') as f:
             for item in data:
-                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+                f.write(orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE))
         
         total_roasts = sum(len(d['roasts']) for d in data)
         
@@ -385,8 +477,8 @@ class RoastMeCollector:
         }
         
         metadata_file = self.output_dir / "metadata.json"
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2)
+        with open(metadata_file, 'wb') as f:
+            f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
         
         print(f"\n{'='*70}")
         print(f"✅ Dataset Saved!")
@@ -455,6 +547,8 @@ def main():
         print(f"\n❌ Error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        collector.close()
 
 if __name__ == "__main__":
     main()
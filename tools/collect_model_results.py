@@ -5,12 +5,12 @@ Collect roast generation results from Modal deployment for evaluation
 """
 
 import asyncio
-import base64
-import json
+import mimetypes
+import orjson
 import random
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 import httpx
 from tqdm.asyncio import tqdm
 
@@ -20,38 +20,66 @@ class ModelDataCollector:
         self,
         upload_url: str,
         generate_batch_url: str,
-        num_candidates: int = 5
+        num_candidates: int = 5,
+        concurrency: int = 16,
+        roast_url: Optional[str] = None
     ):
         self.upload_url = upload_url
         self.generate_batch_url = generate_batch_url
+        self.roast_url = roast_url
         self.num_candidates = num_candidates
-        self.client = httpx.AsyncClient(timeout=120.0)
+        self.concurrency = concurrency
+        # Every request goes to the same Modal host, so HTTP/2 multiplexes
+        # them all over one connection. Transport retries only cover failed
+        # connection attempts, so a POST is never sent twice.
+        self.client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+            ),
+            timeout=120.0
+        )
 
     async def test_single_image(self, image_path: Path, ground_truth: str) -> Dict:
         """Test a single image and collect results"""
-        with open(image_path, "rb") as f:
-            image_bytes = f.read()
-            image_base64 = base64.b64encode(image_bytes).decode("utf-8")
+        # Read in a worker thread so disk I/O doesn't stall the other
+        # in-flight requests on the event loop
+        image_bytes = await asyncio.to_thread(image_path.read_bytes)
+
+        # Raw bytes as multipart/form-data: no base64 encode, 33% less upload
+        content_type = mimetypes.guess_type(image_path.name)[0] or "application/octet-stream"
+        files = {"file": (image_path.name, image_bytes, content_type)}
 
         try:
-            # Upload image
-            upload_response = await self.client.post(
-                self.upload_url,
-                json={"imageBase64": image_base64}
-            )
-            upload_response.raise_for_status()
-            image_id = upload_response.json()["imageId"]
-
-            # Generate roasts
-            generate_response = await self.client.post(
-                self.generate_batch_url,
-                json={
-                    "imageId": image_id,
-                    "numCandidates": self.num_candidates
-                }
-            )
-            generate_response.raise_for_status()
-            result = generate_response.json()
+            if self.roast_url:
+                # Upload + generate in one request (one round trip per image)
+                roast_response = await self.client.post(
+                    self.roast_url,
+                    files=files,
+                    data={"numCandidates": str(self.num_candidates)}
+                )
+                roast_response.raise_for_status()
+                result = roast_response.json()
+            else:
+                # Upload image
+                upload_response = await self.client.post(
+                    self.upload_url,
+                    files=files
+                )
+                upload_response.raise_for_status()
+                image_id = upload_response.json()["imageId"]
+
+                # Generate roasts
+                generate_response = await self.client.post(
+                    self.generate_batch_url,
+                    json={
+                        "imageId": image_id,
+                        "numCandidates": self.num_candidates
+                    }
+                )
+                generate_response.raise_for_status()
+                result = generate_response.json()
 
             return {
                 "image_filename": image_path.name,
@@ -82,28 +110,33 @@ class ModelDataCollector:
         model_name: str
     ) -> Dict:
         """Collect results for all test images"""
-        results = []
-        failed = 0
-
         print(f"\n{'='*70}")
         print(f"🔥 Collecting Results: {model_name}")
         print(f"{'='*70}\n")
         print(f"Images: {len(test_images)}")
         print(f"Candidates per image: {self.num_candidates}")
+        print(f"Concurrent requests: {self.concurrency}")
         print(f"Total roasts to generate: {len(test_images) * self.num_candidates}\n")
 
-        for image_path, ground_truth in tqdm(test_images, desc="Processing"):
-            result = await self.test_single_image(image_path, ground_truth)
-            results.append(result)
+        # Up to `concurrency` images in flight at once; gather keeps results
+        # in test_images order
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(image_path: Path, ground_truth: str) -> Dict:
+            async with semaphore:
+                result = await self.test_single_image(image_path, ground_truth)
 
             if not result["success"]:
-                failed += 1
                 tqdm.write(f"❌ Failed: {image_path.name} - {result['error']}")
             else:
                 tqdm.write(f"✅ {image_path.name}: {len(result['candidates'])} roasts in {result['inference_time_seconds']:.2f}s")
+            return result
 
-            # Brief pause between requests
-            await asyncio.sleep(0.5)
+        results = await tqdm.gather(
+            *(run(image_path, ground_truth) for image_path, ground_truth in test_images),
+            desc="Processing"
+        )
+        failed = sum(1 for r in results if not r["success"])
 
         # Calculate stats
         successful_results = [r for r in results if r["success"]]
@@ -134,9 +167,11 @@ class ModelDataCollector:
             "model_name": model_name,
             "collection_timestamp": datetime.now().isoformat(),
             "config": {
+                "roast_url": self.roast_url,
                 "upload_url": self.upload_url,
                 "generate_batch_url": self.generate_batch_url,
-                "num_candidates": self.num_candidates
+                "num_candidates": self.num_candidates,
+                "concurrency": self.concurrency
             },
             "stats": stats,
             "results": results
@@ -154,8 +189,8 @@ def load_validation_set(num_images: int = 30) -> List[tuple]:
     if not val_file.exists():
         raise FileNotFoundError(f"Validation file not found: {val_file}")
 
-    with open(val_file) as f:
-        val_data = json.load(f)
+    with open(val_file, "rb") as f:
+        val_data = orjson.loads(f.read())
 
     # Sample images
     sampled = random.sample(val_data, min(num_images, len(val_data)))
@@ -183,14 +218,19 @@ async def main():
         required=True,
         help="Model version name (e.g., 'v1' or 'v2')"
     )
+    parser.add_argument(
+        "--roast-url",
+        default="https://jlevy-io--disstrack-roast-api.modal.run/roast",
+        help="Modal combined upload+generate endpoint URL (pass '' to use --upload-url/--generate-url)"
+    )
     parser.add_argument(
         "--upload-url",
-        default="https://jlevy-io--disstrack-roast-upload.modal.run",
+        default="https://jlevy-io--disstrack-roast-api.modal.run/upload",
         help="Modal upload endpoint URL"
     )
     parser.add_argument(
         "--generate-url",
-        default="https://jlevy-io--disstrack-roast-generate-batch.modal.run",
+        default="https://jlevy-io--disstrack-roast-api.modal.run/generate-batch",
         help="Modal generate-batch endpoint URL"
     )
     parser.add_argument(
@@ -205,6 +245,12 @@ async def main():
         default=5,
         help="Number of roasts per image"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Max images processed concurrently"
+    )
     parser.add_argument(
         "--output-dir",
         default="evaluation_results",
@@ -232,7 +278,9 @@ async def main():
     collector = ModelDataCollector(
         upload_url=args.upload_url,
         generate_batch_url=args.generate_url,
-        num_candidates=args.num_candidates
+        num_candidates=args.num_candidates,
+        concurrency=args.concurrency,
+        roast_url=args.roast_url or None
     )
 
     try:
@@ -242,8 +290,8 @@ async def main():
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_file = output_dir / f"{args.model_name}_results_{timestamp}.json"
 
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with open(output_file, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
 
         print(f"{'='*70}")
         print(f"✅ Results saved to: {output_file}")
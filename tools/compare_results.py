@@ -4,18 +4,20 @@ tools/compare_results.py
 Compare v1 vs v2 model results and generate HTML report
 """
 
-import json
+import orjson
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List
 from collections import Counter
+from html import escape
+import heapq
 import statistics
 
 
 def load_results(file_path: Path) -> Dict:
     """Load results JSON file"""
-    with open(file_path) as f:
-        return json.load(f)
+    with open(file_path, "rb") as f:
+        return orjson.loads(f.read())
 
 
 def calculate_metrics(results: List[Dict]) -> Dict:
@@ -35,33 +37,36 @@ def calculate_metrics(results: List[Dict]) -> Dict:
 
     return {
         "total_roasts": len(all_roasts),
-        "avg_length": statistics.mean(lengths) if lengths else 0,
+        "avg_length": statistics.fmean(lengths) if lengths else 0,
         "median_length": statistics.median(lengths) if lengths else 0,
         "min_length": min(lengths) if lengths else 0,
         "max_length": max(lengths) if lengths else 0,
         "std_length": statistics.stdev(lengths) if len(lengths) > 1 else 0,
-        "avg_time": statistics.mean(all_times) if all_times else 0,
+        "avg_time": statistics.fmean(all_times) if all_times else 0,
         "median_time": statistics.median(all_times) if all_times else 0,
         "vocabulary_size": len(unique_words),
-        "unique_words": sorted(list(unique_words))[:100]  # First 100 for display
+        "unique_words": heapq.nsmallest(100, unique_words)  # First 100 for display
     }
 
 
+def index_by_image_id(results: List[Dict]) -> Dict[str, Dict]:
+    """Map image_id -> successful result, for matching up v1 and v2"""
+    return {r["image_id"]: r for r in results if r["success"]}
+
+
 def generate_html_report(
-    v1_data: Dict,
-    v2_data: Dict,
+    v1_by_id: Dict[str, Dict],
+    v2_by_id: Dict[str, Dict],
     v1_metrics: Dict,
     v2_metrics: Dict,
     output_path: Path
 ):
-    """Generate HTML comparison report"""
+    """Generate HTML comparison report from results indexed by image_id"""
 
-    # Match up results by image_id
-    v1_by_id = {r["image_id"]: r for r in v1_data["results"] if r["success"]}
-    v2_by_id = {r["image_id"]: r for r in v2_data["results"] if r["success"]}
-    common_ids = set(v1_by_id.keys()) & set(v2_by_id.keys())
+    num_common = sum(1 for image_id in v1_by_id if image_id in v2_by_id)
 
-    html = f"""
+    with output_path.open("w", encoding="utf-8") as out:
+        out.write(f"""
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -298,7 +303,7 @@ def generate_html_report(
     <div class="container">
         <h1>🔥 Model Comparison: v1 vs v2</h1>
         <p class="subtitle">
-            {len(common_ids)} images compared • Generated {datetime.now().strftime("%Y-%m-%d %H:%M")}
+            {num_common} images compared • Generated {datetime.now().strftime("%Y-%m-%d %H:%M")}
         </p>
         
         <div class="summary">
@@ -370,32 +375,42 @@ def generate_html_report(
                 </div>
             </div>
         </div>
-"""
+""")
 
-    # Add comparisons
-    for image_id in sorted(common_ids):
-        v1_result = v1_by_id[image_id]
-        v2_result = v2_by_id[image_id]
-
-        # Determine winner by average length (closer to target of ~71 chars)
-        v1_avg_len = sum(len(r) for r in v1_result["candidates"]) / len(v1_result["candidates"])
-        v2_avg_len = sum(len(r) for r in v2_result["candidates"]) / len(v2_result["candidates"])
+        # Add comparisons
         target = 71
-        v1_diff = abs(v1_avg_len - target)
-        v2_diff = abs(v2_avg_len - target)
-        v1_winner = v1_diff < v2_diff
-
-        image_rel_path = f"../data/raw/images/{v1_result['image_filename']}"
-
-        html += f"""
+        winner_badge = '<span class="winner-badge">CLOSER TO TARGET</span>'
+        # Images appear in v1's collection order (the seeded validation sample)
+        for image_id, v1_result in v1_by_id.items():
+            v2_result = v2_by_id.get(image_id)
+            if v2_result is None:
+                continue
+            v1_candidates = v1_result["candidates"]
+            v2_candidates = v2_result["candidates"]
+
+            # Determine winner by average length (closer to target of ~71 chars)
+            v1_avg_len = sum(map(len, v1_candidates)) / len(v1_candidates)
+            v2_avg_len = sum(map(len, v2_candidates)) / len(v2_candidates)
+            if abs(v1_avg_len - target) < abs(v2_avg_len - target):
+                v1_badge, v2_badge = winner_badge, ""
+            else:
+                v1_badge, v2_badge = "", winner_badge
+
+            # Roasts, ground truth and filenames come from Reddit/model output:
+            # escape them so they render as text
+            filename = escape(v1_result["image_filename"])
+            ground_truth = escape(v1_result["ground_truth"])
+            image_rel_path = f"../data/raw/images/{filename}"
+
+            out.write(f"""
         <div class="comparison-section">
             <div class="comparison-header">
-                <img src="{image_rel_path}" alt="{v1_result['image_filename']}">
+                <img src="{image_rel_path}" alt="{filename}">
                 <div class="image-info">
-                    <h3>{v1_result['image_filename']}</h3>
+                    <h3>{filename}</h3>
                     <div class="ground-truth">
                         <div class="ground-truth-label">Ground Truth Roast:</div>
-                        <div class="ground-truth-text">{v1_result['ground_truth']}</div>
+                        <div class="ground-truth-text">{ground_truth}</div>
                     </div>
                 </div>
             </div>
@@ -404,45 +419,43 @@ def generate_html_report(
                 <div class="roast-column v1">
                     <h4>
                         v1 (Two-Stage)
-                        {'<span class="winner-badge">CLOSER TO TARGET</span>' if v1_winner else ''}
+                        {v1_badge}
                     </h4>
-"""
-        for i, roast in enumerate(v1_result["candidates"], 1):
-            html += f"""
+""")
+            for i, roast in enumerate(v1_candidates, 1):
+                out.write(f"""
                     <div class="roast-item">
-                        <div class="roast-text">{roast}</div>
+                        <div class="roast-text">{escape(roast)}</div>
                         <div class="roast-meta">#{i} • {len(roast)} chars</div>
                     </div>
-"""
-        html += f"""
+""")
+            out.write(f"""
                 </div>
                 
                 <div class="roast-column v2">
                     <h4>
                         v2 (Simple)
-                        {'<span class="winner-badge">CLOSER TO TARGET</span>' if not v1_winner else ''}
+                        {v2_badge}
                     </h4>
-"""
-        for i, roast in enumerate(v2_result["candidates"], 1):
-            html += f"""
+""")
+            for i, roast in enumerate(v2_candidates, 1):
+                out.write(f"""
                     <div class="roast-item">
-                        <div class="roast-text">{roast}</div>
+                        <div class="roast-text">{escape(roast)}</div>
                         <div class="roast-meta">#{i} • {len(roast)} chars</div>
                     </div>
-"""
-        html += """
+""")
+            out.write("""
                 </div>
             </div>
         </div>
-"""
+""")
 
-    html += """
+        out.write("""
     </div>
 </body>
 </html>
-"""
-
-    output_path.write_text(html, encoding="utf-8")
+""")
 
 
 def print_summary(v1_data: Dict, v2_data: Dict, v1_metrics: Dict, v2_metrics: Dict):
@@ -515,6 +528,10 @@ def main():
     print(f"Loading v2 results: {args.v2_results}")
     v2_data = load_results(Path(args.v2_results))
 
+    # Match up results by image_id
+    v1_by_id = index_by_image_id(v1_data["results"])
+    v2_by_id = index_by_image_id(v2_data["results"])
+
     # Calculate metrics
     print("\n📊 Calculating metrics...")
     v1_metrics = calculate_metrics(v1_data["results"])
@@ -528,7 +545,7 @@ def main():
     html_file = output_dir / f"comparison_report_{timestamp}.html"
 
     print(f"📝 Generating HTML report...")
-    generate_html_report(v1_data, v2_data, v1_metrics, v2_metrics, html_file)
+    generate_html_report(v1_by_id, v2_by_id, v1_metrics, v2_metrics, html_file)
 
     # Print summary
     print_summary(v1_data, v2_data, v1_metrics, v2_metrics)
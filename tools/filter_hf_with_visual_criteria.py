@@ -5,147 +5,39 @@ Apply the SAME aggressive filtering to HF dataset
 that we used on our original data (minus score requirement)
 """
 
-import json
-import re
+import orjson
+import os
+import statistics
 from pathlib import Path
 from collections import Counter
-from typing import Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
 
-def ultra_clean_roast(roast_text: str) -> Optional[str]:
-    """
-    EXACT COPY from clean_and_convert.py
-    Ultra-aggressive cleaning - return None if can't be salvaged
-    """
-    original = roast_text
-    
-    # 1. Remove Edit/Award acknowledgments (very common)
-    roast_text = re.sub(r'Edit:.*$', '', roast_text, flags=re.IGNORECASE | re.MULTILINE)
-    roast_text = re.sub(r'EDIT:.*$', '', roast_text, flags=re.IGNORECASE | re.MULTILINE)
-    roast_text = re.sub(r'Thanks? for the (gold|silver|platinum|award).*$', '', roast_text, flags=re.IGNORECASE | re.MULTILINE)
-    roast_text = re.sub(r'Thank you (kind stranger|for the gold).*$', '', roast_text, flags=re.IGNORECASE)
-    
-    # 2. Remove GIF/image references
-    roast_text = re.sub(r'!\[gif\]\(.*?\)', '', roast_text)
-    roast_text = re.sub(r'!\[.*?\]\(.*?\)', '', roast_text)
-    roast_text = re.sub(r'\[gif\]\(.*?\)', '', roast_text)
-    
-    # 3. Remove ALL markdown/links
-    roast_text = re.sub(r'\[([^\]]*)\]\([^\)]*\)', r'\1', roast_text)
-    roast_text = re.sub(r'https?://\S+', '', roast_text)
-    
-    # 4. Remove Reddit references
-    roast_text = re.sub(r'r/\w+', '', roast_text)
-    roast_text = re.sub(r'u/\w+', '', roast_text)
-    
-    # 5. Remove emojis (ALL of them)
-    roast_text = re.sub(r'[\U00010000-\U0010ffff]', '', roast_text, flags=re.UNICODE)
-    roast_text = re.sub(r'[\u2600-\u27BF]', '', roast_text)
-    roast_text = re.sub(r'[\U0001F300-\U0001F9FF]', '', roast_text)
-    
-    # 6. Remove hashtags
-    roast_text = re.sub(r'#\w+', '', roast_text)
-    
-    # 7. Remove markdown formatting
-    roast_text = re.sub(r'[*_]{1,}', '', roast_text)
-    roast_text = re.sub(r'#{1,6}\s', '', roast_text)
-    
-    # 8. Clean up brackets/parentheses
-    roast_text = re.sub(r'\[\s*\]', '', roast_text)
-    roast_text = re.sub(r'\(\s*\)', '', roast_text)
-    
-    # 9. Remove excessive punctuation
-    roast_text = re.sub(r'([!?]){3,}', r'\1\1', roast_text)
-    roast_text = re.sub(r'\.{3,}', '...', roast_text)
-    
-    # 10. Clean whitespace
-    roast_text = re.sub(r'\n+', ' ', roast_text)
-    roast_text = re.sub(r'\s+', ' ', roast_text)
-    roast_text = roast_text.strip()
-    
-    # 11. Remove trailing artifacts
-    roast_text = re.sub(r'\.\.\.\s*$', '', roast_text)
-    roast_text = roast_text.strip()
-    
-    # 12. Final cleanup - remove if too much was removed
-    if not roast_text or len(roast_text) < 20:
-        return None
-    
-    if len(roast_text) < len(original) * 0.3:
-        return None
-    
-    return roast_text
+from _clean_core import ultra_clean_roast, is_high_quality
 
-def is_high_quality(roast_text: str) -> Tuple[bool, str]:
+def _filter_roasts(roasts: List[str]) -> List[Tuple[Optional[str], str]]:
     """
-    EXACT COPY from clean_and_convert.py (MINUS score check)
-    STRICT quality check focused on visual grounding
-    Returns: (is_valid, reason)
+    Clean and filter one chunk of raw roasts (runs in a worker process)
+    Returns: (cleaned, reason) per roast; cleaned is None unless reason is 'kept'
     """
-    text_lower = roast_text.lower()
-    
-    # 1. Length check - STRICT
-    if len(roast_text) < 25:
-        return False, "too_short"
-    if len(roast_text) > 150:
-        return False, "too_long"
-    
-    # 2. Score check - SKIPPED (HF dataset has no scores)
-    # if roast_score < 100:
-    #     return False, "low_score"
-    
-    # 3. AUTO-REJECT patterns (non-visual content)
-    reject_patterns = [
-        r'\bkarma\b', r'\bsubscriber[s]?\b', r'\bharvard\b', r'\bcollege\b',
-        r'\bi bet you\b', r'\byou probably\b', r'\bi heard\b',
-        r'\bglad\b', r'\bcongrat[s]?\b', r'\bgood job\b', r'\bnice\b',
-        r'\bperfectly valid\b', r'\bwe care\b',
-        r'\bthis time\b', r'\bupdated\b', r'\bagain\b', r'\bstill\b',
-        r'\bvirgin\b', r'\bgirlfriend\b', r'\bboyfriend\b',
-        r'\bjob\b', r'\bmoney\b', r'\brich\b', r'\bpoor\b'
-    ]
-    
-    for pattern in reject_patterns:
-        if re.search(pattern, text_lower):
-            return False, "non_visual_content"
-    
-    # 4. MUST have visual comparison OR multiple physical features
-    visual_comparisons = [
-        r'\blook like\b', r'\blooks like\b', r'\blooking like\b',
-        r'\bremind[s]? me of\b', r'\bresemble[s]?\b',
-        r'\bif .+ had a baby\b', r'\bif .+ and .+ had\b',
-        r'\bknockoff\b', r'\bdollar store\b', r'\bwish\.com\b'
-    ]
-    
-    has_comparison = any(re.search(pattern, text_lower) for pattern in visual_comparisons)
-    
-    # Physical features
-    physical_features = [
-        'face', 'forehead', 'fivehead', 'hair', 'hairline', 'receding',
-        'eye', 'eyes', 'nose', 'mouth', 'teeth', 'smile', 'smiling',
-        'chin', 'eyebrow', 'eyebrows', 'beard', 'mustache',
-        'head', 'neck', 'cheek', 'cheeks', 'jaw', 'lips',
-        'body', 'arm', 'arms', 'hand', 'hands'
-    ]
+    results = []
     
-    feature_count = sum(1 for f in physical_features if f in text_lower)
-    
-    # Need EITHER comparison OR 2+ features
-    if not has_comparison and feature_count < 2:
-        return False, "not_visual_enough"
-    
-    # 5. Check for remaining artifacts
-    bad_patterns = [
-        r'http', r'www\.', r'\.com', r'imgur', r'reddit',
-        r'subreddit', r'upvote'
-    ]
-    
-    for pattern in bad_patterns:
-        if re.search(pattern, text_lower):
-            return False, "has_artifact"
+    for roast in roasts:
+        # Clean (EXACT same function)
+        cleaned = ultra_clean_roast(roast)
+        
+        if not cleaned:
+            results.append((None, 'cleaning_failed'))
+            continue
+        
+        # Quality check (EXACT same function, minus score)
+        is_valid, reason = is_high_quality(cleaned, roast_score=None)
+        
+        results.append((cleaned, 'kept') if is_valid else (None, reason))
     
-    return True, "valid"
+    return results
 
-def filter_hf_dataset():
+def filter_hf_dataset(workers: Optional[int] = None, chunk_size: int = 1000):
     """Apply SAME filtering as original data (minus score requirement)"""
     
     print("\n" + "="*70)
@@ -162,36 +54,34 @@ def filter_hf_dataset():
         print("Run tools/analyze_reddit_roastme_hf.py first!")
         return
     
-    with open(hf_file) as f:
-        data = json.load(f)
+    with open(hf_file, 'rb') as f:
+        data = orjson.loads(f.read())
     
     raw_roasts = data['roasts']
     print(f"Raw HF roasts: {len(raw_roasts):,}")
     print(f"Your original raw roasts: 4,002\n")
     
-    # Apply SAME filtering
+    # Apply SAME filtering, one chunk of roasts per worker process.
+    # Reposted roasts are only checked once: each distinct text gets one
+    # outcome, which is then counted for every occurrence in raw order,
+    # so filtered_roasts (and the seeded sample below) match a sequential run.
     filtered_roasts = []
     stats = Counter()
     
+    workers = workers or os.cpu_count() or 1
+    distinct = list(dict.fromkeys(raw_roasts))
+    chunks = [distinct[i:i + chunk_size] for i in range(0, len(distinct), chunk_size)]
+    outcomes = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk, results in zip(chunks, executor.map(_filter_roasts, chunks)):
+            outcomes.update(zip(chunk, results))
+    
     for roast in raw_roasts:
+        cleaned, reason = outcomes[roast]
         stats['total'] += 1
-        
-        # Clean (EXACT same function)
-        cleaned = ultra_clean_roast(roast)
-        
-        if not cleaned:
-            stats['cleaning_failed'] += 1
-            continue
-        
-        # Quality check (EXACT same function, minus score)
-        is_valid, reason = is_high_quality(cleaned)
-        
-        if not is_valid:
-            stats[reason] += 1
-            continue
-        
-        filtered_roasts.append(cleaned)
-        stats['kept'] += 1
+        stats[reason] += 1
+        if cleaned is not None:
+            filtered_roasts.append(cleaned)
     
     # Results
     print("="*70)
@@ -222,7 +112,7 @@ def filter_hf_dataset():
     print(f"   Min:    {min(lengths)} chars")
     print(f"   Max:    {max(lengths)} chars")
     print(f"   Mean:   {sum(lengths)/len(lengths):.1f} chars")
-    print(f"   Median: {sorted(lengths)[len(lengths)//2]} chars")
+    print(f"   Median: {statistics.median_high(lengths)} chars")
     
     your_avg = 71  # From your training data
     print(f"\n   Your data mean: ~{your_avg} chars")
@@ -251,8 +141,8 @@ def filter_hf_dataset():
         "roasts": filtered_roasts
     }
     
-    with open(output_file, 'w') as f:
-        json.dump(output_data, f, indent=2)
+    with open(output_file, 'wb') as f:
+        f.write(orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
     
     print(f"{'='*70}")
     print("COMPARISON & VIABILITY")
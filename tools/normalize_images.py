@@ -5,17 +5,83 @@ Optimizes size and quality for faster training without quality loss
 
 from PIL import Image
 from pathlib import Path
+import orjson
 from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Optional, Tuple
+import os
 import shutil
 import sys
 
+def _normalize_one(
+    img_path: Path,
+    output_path: Path,
+    max_size: int,
+    quality: int
+) -> Tuple[int, int, bool, Optional[str]]:
+    """
+    Normalize one image (runs in a worker process)
+    Returns: (size_before, size_after, resized, error)
+    """
+    original_size = 0
+    try:
+        # Get original size
+        original_size = img_path.stat().st_size
+        
+        # Open image (reads the header only; pixels are decoded on first use)
+        img = Image.open(img_path)
+        
+        # Get current dimensions
+        width, height = img.size
+        resized = width > max_size or height > max_size
+        
+        # Calculate new size (maintain aspect ratio)
+        if resized:
+            if width > height:
+                new_width = max_size
+                new_height = int(height * (max_size / width))
+            else:
+                new_height = max_size
+                new_width = int(width * (max_size / height))
+            
+            # JPEGs can be decoded directly at 1/2, 1/4 or 1/8 scale: draft
+            # picks the smallest scale still >= the target size (no-op for
+            # other formats), so less is decoded before LANCZOS
+            img.draft('RGB', (new_width, new_height))
+        
+        # Convert to RGB if needed
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        
+        if resized:
+            # High-quality resize using LANCZOS
+            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        
+        # Save optimized JPEG
+        output_file = output_path / f"{img_path.stem}.jpg"
+        img.save(
+            output_file,
+            'JPEG',
+            quality=quality,
+            optimize=True,
+            progressive=True
+        )
+        
+        # Get new size
+        return original_size, output_file.stat().st_size, resized, None
+        
+    except Exception as e:
+        return original_size, 0, False, str(e)
+
 def normalize_images(
     input_dir: str,
     output_dir: str,
     max_size: int = 1024,
     quality: int = 90,
     backup: bool = True,
-    verbose: bool = True
+    verbose: bool = True,
+    workers: Optional[int] = None
 ):
     """
     Normalize images for vision model training
@@ -27,6 +93,7 @@ def normalize_images(
         quality: JPEG quality (1-100)
         backup: Create backup of originals
         verbose: Print detailed stats
+        workers: Worker processes (default: all CPUs)
     
     Returns:
         dict: Statistics about the normalization
@@ -47,6 +114,9 @@ def normalize_images(
         if not backup_path.exists():
             if verbose:
                 print(f"💾 Creating backup at {backup_path}...")
+            # Real copies, not hardlinks: a later in-place run or a
+            # collect_data rewrite of the originals would otherwise write
+            # through the shared inodes and corrupt the backup too
             shutil.copytree(input_path, backup_path)
             if verbose:
                 print(f"✅ Backup created!\n")
@@ -83,58 +153,27 @@ def normalize_images(
         'size_after': 0
     }
     
-    iterator = tqdm(image_files, desc="Normalizing") if verbose else image_files
+    # Each image is an independent decode/resize/encode, so they are spread
+    # over worker processes; map() returns results in image_files order
+    process = partial(_normalize_one, output_path=output_path, max_size=max_size, quality=quality)
     
-    for img_path in iterator:
-        try:
-            # Get original size
-            original_size = img_path.stat().st_size
-            stats['size_before'] += original_size
-            
-            # Open image
-            img = Image.open(img_path)
-            
-            # Convert to RGB if needed
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Get current dimensions
-            width, height = img.size
-            original_dimensions = (width, height)
-            
-            # Calculate new size (maintain aspect ratio)
-            if width > max_size or height > max_size:
-                if width > height:
-                    new_width = max_size
-                    new_height = int(height * (max_size / width))
-                else:
-                    new_height = max_size
-                    new_width = int(width * (max_size / height))
-                
-                # High-quality resize using LANCZOS
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                stats['resized'] += 1
-            
-            # Save optimized JPEG
-            output_file = output_path / f"{img_path.stem}.jpg"
-            img.save(
-                output_file,
-                'JPEG',
-                quality=quality,
-                optimize=True,
-                progressive=True
-            )
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        results = executor.map(process, image_files, chunksize=8)
+        if verbose:
+            results = tqdm(results, total=len(image_files), desc="Normalizing")
+        
+        for img_path, (size_before, size_after, resized, error) in zip(image_files, results):
+            stats['size_before'] += size_before
             
-            # Get new size
-            new_size = output_file.stat().st_size
-            stats['size_after'] += new_size
+            if error is not None:
+                stats['errors'] += 1
+                if verbose:
+                    print(f"\n⚠️  Error processing {img_path.name}: {error}")
+                continue
             
+            stats['size_after'] += size_after
+            stats['resized'] += resized
             stats['processed'] += 1
-            
-        except Exception as e:
-            stats['errors'] += 1
-            if verbose:
-                print(f"\n⚠️  Error processing {img_path.name}: {e}")
     
     # Report
     if verbose:
@@ -170,8 +209,6 @@ def update_training_json(
     Update training JSON to point to normalized images
     """
     
-    import json
-    
     print("="*70)
     print("🔄 UPDATING TRAINING DATA")
     print("="*70 + "\n")
@@ -188,23 +225,25 @@ def update_training_json(
     print(f"💾 Backup saved: {backup_file}")
     
     # Load and update
-    with open(json_path, 'r') as f:
-        data = json.load(f)
+    with open(json_path, 'rb') as f:
+        data = orjson.loads(f.read())
     
     print(f"📝 Updating {len(data)} entries...")
     
     # Update image paths
     for item in data:
         if 'image' in item:
-            filename = Path(item['image']).name
+            filename = os.path.basename(item['image'])
             # Ensure .jpg extension
             if not filename.endswith('.jpg'):
                 filename = filename.rsplit('.', 1)[0] + '.jpg'
             item['image'] = filename
     
-    # Save
-    with open(json_path, 'w') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    # Save in clean_and_convert's layout: compact JSON array, one sample per line
+    with open(json_path, 'wb') as f:
+        f.write(b'[\n')
+        f.write(b',\n'.join(orjson.dumps(item) for item in data))
+        f.write(b'\n]\n')
     
     print(f"✅ Updated image paths to: {new_image_folder}/")
     print(f"📁 Saved to: {json_path}\n")
@@ -5,8 +5,10 @@ Sample 20k SHORT visual roasts from HF dataset for Stage 1
 STRICT: 25-100 chars only (under 100 ideal)
 """
 
-import json
+import orjson
 import random
+import statistics
+from collections import Counter
 from pathlib import Path
 
 
@@ -34,8 +36,8 @@ def prepare_stage1_data(num_samples: int = 20000, max_length: int = 100, seed: i
         return None
 
     print(f"Loading: {hf_file}")
-    with open(hf_file) as f:
-        data = json.load(f)
+    with open(hf_file, "rb") as f:
+        data = orjson.loads(f.read())
 
     all_roasts = data["roasts"]
     print(f"Total filtered roasts: {len(all_roasts):,}")
@@ -68,34 +70,37 @@ def prepare_stage1_data(num_samples: int = 20000, max_length: int = 100, seed: i
         })
 
     lengths = [len(r) for r in sampled_roasts]
+    avg_length = sum(lengths) / len(lengths)
 
     print("=" * 70)
     print("📊 FINAL DATASET STATISTICS")
     print("=" * 70 + "\n")
 
     print(f"Total samples: {len(llava_data):,}")
-    print(f"Avg length: {sum(lengths)/len(lengths):.1f} chars")
-    print(f"Median length: {sorted(lengths)[len(lengths)//2]} chars")
+    print(f"Avg length: {avg_length:.1f} chars")
+    print(f"Median length: {statistics.median_high(lengths)} chars")
     print(f"Min length: {min(lengths)} chars")
     print(f"Max length: {max(lengths)} chars")
-    print(f"Std dev: {(sum((x - sum(lengths)/len(lengths))**2 for x in lengths) / len(lengths))**0.5:.1f} chars\n")
+    print(f"Std dev: {statistics.pstdev(lengths, avg_length):.1f} chars\n")
 
     print("Length Distribution:")
     bins = [(25, 50), (51, 75), (76, 100)]
+    # One counting pass over the lengths; each bin then sums a few dozen counts
+    length_counts = Counter(lengths)
     for low, high in bins:
-        count = sum(1 for l in lengths if low <= l <= high)
+        count = sum(length_counts[l] for l in range(low, high + 1))
         pct = (count / len(lengths)) * 100
         bar = "█" * int(pct / 2)
         print(f"   {low:3d}-{high:3d} chars: {count:5,} ({pct:5.1f}%) {bar}")
 
     print(f"\n✅ All roasts are under 100 chars (matches system prompt ideal)")
-    print(f"✅ Avg {sum(lengths)/len(lengths):.1f} chars aligns with training goal\n")
+    print(f"✅ Avg {avg_length:.1f} chars aligns with training goal\n")
 
     output_dir = Path("data/llava_format")
     output_file = output_dir / "stage1_text_only.json"
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(llava_data, f, indent=2, ensure_ascii=False)
+    with open(output_file, "wb") as f:
+        f.write(orjson.dumps(llava_data, option=orjson.OPT_INDENT_2))
 
     file_size_mb = output_file.stat().st_size / 1024 / 1024
 
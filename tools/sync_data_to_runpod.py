@@ -1,14 +1,48 @@
 #!/usr/bin/env python3
 """
 Sync data folder to RunPod instance
-Usage: python tools/sync_data_to_runpod.py "ssh root@213.181.122.217 -p 13186 -i ~/.ssh/id_ed25519"
+Usage: python tools/sync_data_to_runpod.py "ssh root@213.181.122.217 -p 13186 -i ~/.ssh/id_ed25519" [--parallel N]
 """
 
 import sys
-import re
 import subprocess
 import os
+import heapq
+import hashlib
+import shlex
+import shutil
+import tempfile
+import threading
+import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+# xxhash is only needed for --checksum-manifest; without it that mode
+# falls back to a plain rsync
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# The manifest is the only JSON here, so orjson stays optional as well
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    import json
+    _json_loads = json.loads
+    
+    def _json_dumps(obj) -> bytes:
+        """Compact UTF-8 JSON, like orjson.dumps"""
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
+# Manifest of the last synced content, kept next to the data on the pod
+MANIFEST_NAME = ".sync-manifest.json"
+
+# ssh options that take a value (from ssh's getopt string)
+_SSH_VALUE_OPTIONS = set("BbcDEeFIiJLlmOopQRSWw")
 
 def parse_ssh_command(ssh_cmd: str) -> dict:
     """
@@ -22,32 +56,351 @@ def parse_ssh_command(ssh_cmd: str) -> dict:
         'identity_file': '~/.ssh/id_ed25519'
     }
     """
-    # Extract user@host
-    user_host_match = re.search(r'ssh\s+(\w+)@([\d.]+)', ssh_cmd)
-    if not user_host_match:
-        raise ValueError(f"Could not parse user@host from: {ssh_cmd}")
+    # One tokenize pass (handles quoted key paths), then walk the options
+    # the way ssh does (before and after the destination, up to a remote
+    # command), so "-o Key=value" values are never mistaken for the
+    # destination and any hostname is accepted
+    tokens = shlex.split(ssh_cmd)
+    if not tokens or os.path.basename(tokens[0]) != "ssh":
+        raise ValueError(f"Not an ssh command: {ssh_cmd}")
     
-    user = user_host_match.group(1)
-    host = user_host_match.group(2)
+    options = {}
+    destination = None
+    i = 1
+    while i < len(tokens):
+        token = tokens[i]
+        if token.startswith("-") and len(token) > 1:
+            # Clustered flags ("-tt"), or one option with its value attached ("-p22") or next
+            for j, flag in enumerate(token[1:], start=1):
+                if flag in _SSH_VALUE_OPTIONS:
+                    if j + 1 < len(token):
+                        options[flag] = token[j + 1:]
+                    elif i + 1 < len(tokens):
+                        i += 1
+                        options[flag] = tokens[i]
+                    else:
+                        raise ValueError(f"Missing value for -{flag} in: {ssh_cmd}")
+                    break
+        elif destination is None:
+            destination = token
+        else:
+            break  # Remote command
+        i += 1
     
-    # Extract port
-    port_match = re.search(r'-p\s+(\d+)', ssh_cmd)
-    port = port_match.group(1) if port_match else "22"
+    # Extract user@host
+    if destination is None:
+        raise ValueError(f"Could not parse user@host from: {ssh_cmd}")
+    user, _, host = destination.rpartition("@")
+    user = user or options.get("l")
+    if host.startswith("[") and host.endswith("]"):
+        host = host[1:-1]  # IPv6 literal; ssh takes it bare
+    if not user or not host:
+        raise ValueError(f"Could not parse user@host from: {ssh_cmd}")
     
-    # Extract identity file
-    identity_match = re.search(r'-i\s+([\S]+)', ssh_cmd)
-    identity_file = identity_match.group(1) if identity_match else None
+    port = options.get("p", "22")
+    if not port.isdigit():
+        raise ValueError(f"Invalid port '{port}' in: {ssh_cmd}")
     
     return {
         'user': user,
         'host': host,
         'port': port,
-        'identity_file': identity_file
+        'identity_file': options.get("i")
     }
 
-def sync_data(ssh_info: dict, local_data_dir: str = "data", remote_path: str = "/workspace/disstrack-finetune/data"):
+def ssh_mux_options(ssh_info: dict) -> List[str]:
+    """
+    SSH options that share one master connection (ControlMaster) between
+    the rsync streams, so each skips the TCP/key exchange/auth handshake
+    Set DISSTRACK_DISABLE_SSH_MUX=1 to turn this off
+    """
+    if os.environ.get("DISSTRACK_DISABLE_SSH_MUX"):
+        return []
+    
+    # Short hashed name: socket paths are limited to ~104 bytes
+    key = f"{ssh_info['user']}@{ssh_info['host']}:{ssh_info['port']}"
+    control_path = f"/tmp/rsync-mux-{hashlib.sha1(key.encode()).hexdigest()[:12]}"
+    return [
+        "-o", "ControlMaster=auto",
+        "-o", f"ControlPath={control_path}",
+        "-o", "ControlPersist=600",
+        "-o", "ServerAliveInterval=30",
+    ]
+
+# At this link speed (Mbit/s) and above, sending raw bytes beats spending CPU to save them
+FAST_LINK_MBPS = 1000
+
+def rsync_transfer_flags(link_mbps: Optional[float] = None) -> List[str]:
+    """
+    Transfer flags for the link speed. Fast links send whole files,
+    uncompressed: the delta scan and single-core compression are slower
+    than the network. Otherwise compress with zstd if the local rsync
+    supports it (3.2+), else zlib (-z)
+    """
+    if link_mbps is not None and link_mbps >= FAST_LINK_MBPS:
+        return ["--whole-file"]
+    
+    version = subprocess.run(["rsync", "--version"], capture_output=True, text=True).stdout
+    if "zstd" in version:
+        return ["--compress-choice=zstd", "--compress-level=3"]
+    return ["-z"]
+
+def local_file_sizes(local_path: Path) -> List[Tuple[int, str]]:
+    """
+    (size, path relative to local_path) of every file under local_path
+    Symlinks are listed with their own size, as rsync -a sends them as links
+    """
+    # os.scandir entries carry the file type from readdir, and the relative
+    # path is built up per directory instead of via os.path.relpath
+    files = []
+    stack = [(str(local_path), "")]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                rel_path = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel_path + "/"))
+                else:
+                    files.append((entry.stat(follow_symlinks=False).st_size, rel_path))
+    return files
+
+def remote_space(ssh_cmd: str, destination: str, remote_path: str) -> Tuple[int, int]:
+    """
+    One SSH call for (free bytes, bytes already at remote_path) on the pod
+    Free space is read on remote_path's closest existing parent
+    """
+    quoted_path = shlex.quote(remote_path)
+    script = (
+        f"p={quoted_path}; used=$(du -sb \"$p\" 2>/dev/null | cut -f1); "
+        "while [ ! -e \"$p\" ]; do p=$(dirname \"$p\"); done; "
+        "df -B1 --output=avail \"$p\" | tail -1; echo \"${used:-0}\""
+    )
+    output = subprocess.run(shlex.split(ssh_cmd) + [destination, script], capture_output=True, text=True, check=True).stdout
+    free, used = output.split()
+    return int(free), int(used)
+
+def format_gib(num_bytes: int) -> str:
+    """Bytes as a GiB string, e.g. '12.3 GiB'"""
+    return f"{num_bytes / 1024**3:.1f} GiB"
+
+def probe_upload_mbps(ssh_cmd: str, destination: str, probe_bytes: int = 64 * 1024**2) -> float:
+    """Upload probe_bytes of zeros through SSH and time it (Mbit/s)"""
+    remote_cmd = shlex.split(ssh_cmd) + [destination]
+    # Connect first, so the handshake is not timed (with the mux, this is
+    # also the master connection the transfer reuses)
+    subprocess.run(remote_cmd + ["true"], check=True)
+    start = time.monotonic()
+    subprocess.run(remote_cmd + ["cat > /dev/null"], input=bytes(probe_bytes), check=True)
+    return probe_bytes * 8 / (time.monotonic() - start) / 1e6
+
+def split_into_buckets(files: List[Tuple[int, str]], num_buckets: int) -> List[List[str]]:
+    """
+    Split (size, path) files into size-balanced buckets
+    Largest files go first, each to the currently lightest bucket
+    Returns: lists of paths (empty buckets dropped)
+    """
+    files = sorted(files, reverse=True)
+    
+    buckets = [[] for _ in range(num_buckets)]
+    loads = [(0, i) for i in range(num_buckets)]  # (bytes, bucket index) heap
+    for size, rel_path in files:
+        load, i = heapq.heappop(loads)
+        buckets[i].append(rel_path)
+        heapq.heappush(loads, (load + size, i))
+    
+    return [bucket for bucket in buckets if bucket]
+
+def build_manifest(local_path: Path, files: List[Tuple[int, str]]) -> Dict[str, list]:
+    """
+    {relative path: [size, XXH3-128 hex digest]} of the local files
+    Symlinks are hashed by their target path, as rsync -a sends the link
+    """
+    manifest = {}
+    for size, rel_path in files:
+        path = local_path / rel_path
+        if path.is_symlink():
+            digest = xxhash.xxh3_128(os.fsencode(os.readlink(path)))
+        else:
+            digest = xxhash.xxh3_128()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        manifest[rel_path] = [size, digest.hexdigest()]
+    return manifest
+
+def fetch_remote_manifest(ssh_cmd: str, destination: str, remote_path: str) -> Dict[str, list]:
+    """Manifest uploaded by the last manifest sync, or {} if there is none"""
+    manifest_path = shlex.quote(f"{remote_path}/{MANIFEST_NAME}")
+    result = subprocess.run(shlex.split(ssh_cmd) + [destination, f"cat {manifest_path} 2>/dev/null"], capture_output=True)
+    try:
+        return _json_loads(result.stdout) if result.returncode == 0 else {}
+    except ValueError:  # Both JSONDecodeErrors are ValueErrors
+        return {}
+
+def upload_manifest(ssh_cmd: str, destination: str, remote_path: str, manifest: Dict[str, list]):
+    """Store the manifest on the pod for the next sync to diff against"""
+    manifest_path = shlex.quote(f"{remote_path}/{MANIFEST_NAME}")
+    subprocess.run(shlex.split(ssh_cmd) + [destination, f"cat > {manifest_path}"], input=_json_dumps(manifest), check=True)
+
+class ProgressMeter:
+    """
+    One combined progress line for parallel rsync streams
+    Redrawn at most every `interval` seconds, however often streams report
+    """
+    
+    def __init__(self, total_bytes: int, interval: float = 0.1):
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.stream_bytes = {}
+        self.last_draw = 0.0
+        self.lock = threading.Lock()
+    
+    def update(self, stream: int, num_bytes: int):
+        """Record a stream's byte count; redraw if the interval has passed"""
+        with self.lock:
+            self.stream_bytes[stream] = num_bytes
+            now = time.monotonic()
+            if now - self.last_draw >= self.interval:
+                self.last_draw = now
+                self.draw()
+    
+    def draw(self):
+        done = sum(self.stream_bytes.values())
+        pct = done / self.total_bytes * 100 if self.total_bytes else 100.0
+        sys.stdout.write(f"\r   {format_gib(done)} / {format_gib(self.total_bytes)} ({pct:5.1f}%)")
+        sys.stdout.flush()
+    
+    def finish(self):
+        with self.lock:
+            self.draw()
+            print()
+
+def read_progress(process: subprocess.Popen, on_progress: Callable[[int], None]):
+    """Pass the byte count of each rsync --info=progress2 update to on_progress"""
+    # Updates end in \r (same line) or \n; a partial one waits for the next read
+    pending = b""
+    for chunk in iter(lambda: process.stdout.read1(65536), b""):
+        *updates, pending = (pending + chunk).replace(b"\r", b"\n").split(b"\n")
+        for update in updates:
+            # "  1,234,567  45%  12.34MB/s  0:00:01 (xfr#3, to-chk=10/20)"
+            fields = update.split()
+            if len(fields) > 1 and fields[1].endswith(b"%"):
+                try:
+                    on_progress(int(fields[0].replace(b",", b"").replace(b".", b"")))
+                except ValueError:
+                    pass
+
+# rsync exit codes worth another attempt: socket I/O error, partial
+# transfer, timeout, ssh connection error (not usage/permission errors)
+_TRANSIENT_EXIT_CODES = {12, 23, 30, 255}
+
+def run_rsync(rsync_cmd: List[str], retries: int = 2, on_progress: Optional[Callable[[int], None]] = None):
+    """
+    Run one rsync, retrying transient failures after 5s, 15s, 45s, ...
+    (--partial-dir makes each retry resume instead of starting over)
+    With on_progress, rsync's stdout is read for progress2 byte counts
+    instead of going to the terminal
+    Raises CalledProcessError once the retries are used up
+    """
+    for attempt in range(retries + 1):
+        try:
+            if on_progress is None:
+                subprocess.run(rsync_cmd, check=True)
+            else:
+                process = subprocess.Popen(rsync_cmd, stdout=subprocess.PIPE)
+                read_progress(process, on_progress)
+                if process.wait() != 0:
+                    raise subprocess.CalledProcessError(process.returncode, rsync_cmd)
+            return
+        except subprocess.CalledProcessError as e:
+            if e.returncode not in _TRANSIENT_EXIT_CODES or attempt == retries:
+                raise
+            delay = 5 * 3 ** attempt
+            print(f"\n⚠️  rsync exited with code {e.returncode}, retrying in {delay}s ({attempt + 1}/{retries})")
+            time.sleep(delay)
+
+def run_parallel_rsync(rsync_cmd: List[str], buckets: List[List[str]], total_bytes: int, retries: int = 2):
+    """
+    Run one rsync per bucket concurrently (--files-from), so several SSH
+    streams share the encryption work. Each stream retries on its own;
+    raises CalledProcessError if any still fails
+    """
+    # Streams report only their progress2 counters (no file names or stats),
+    # which a ProgressMeter sums into one line on the terminal
+    base_cmd = ["--info=progress2,name0" if arg.startswith("--info=") else arg for arg in rsync_cmd]
+    source, destination = base_cmd[-2:]
+    meter = ProgressMeter(total_bytes)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        commands = []
+        for i, bucket in enumerate(buckets):
+            files_from = Path(tmp_dir) / f"bucket_{i}.txt"
+            files_from.write_bytes(b"\0".join(os.fsencode(p) for p in bucket))
+            commands.append(base_cmd[:-2] + [f"--files-from={files_from}", "--from0", source, destination])
+        
+        def run_stream(i: int):
+            run_rsync(commands[i], retries, lambda num_bytes: meter.update(i, num_bytes))
+        
+        with ThreadPoolExecutor(max_workers=len(commands)) as executor:
+            list(executor.map(run_stream, range(len(commands))))
+    
+    meter.finish()
+
+def tar_push_stages(ssh_cmd: str, destination: str, local_data_dir: str, remote_path: str, compress: bool) -> List[List[str]]:
+    """
+    Commands of the tar | zstd | ssh pipeline for a first push to an empty
+    pod: one archive stream instead of rsync's per-file round-trips
+    """
+    quoted_path = shlex.quote(remote_path)
+    extract = f"mkdir -p {quoted_path} && " + ("zstd -d | " if compress else "") + f"tar -xf - -C {quoted_path}"
+    
+    stages = [["tar", "-cf", "-", "-C", local_data_dir, "."]]
+    if compress:
+        stages.append(["zstd", "-T0", "-3"])
+    stages.append(shlex.split(ssh_cmd) + [destination, extract])
+    return stages
+
+def run_pipeline(stages: List[List[str]]):
+    """
+    Run commands connected stdout -> stdin, like a shell pipeline
+    Raises CalledProcessError for the last stage that failed (like pipefail;
+    earlier stages usually only died of SIGPIPE because of it)
+    """
+    processes = []
+    for i, cmd in enumerate(stages):
+        stdin = processes[-1].stdout if processes else None
+        stdout = subprocess.PIPE if i < len(stages) - 1 else None
+        processes.append(subprocess.Popen(cmd, stdin=stdin, stdout=stdout))
+        if stdin is not None:
+            stdin.close()  # Only the next stage holds the pipe, so a failed reader stops the writer
+    
+    return_codes = [process.wait() for process in processes]
+    for cmd, code in reversed(list(zip(stages, return_codes))):
+        if code != 0:
+            raise subprocess.CalledProcessError(code, cmd)
+
+def print_next_steps(ssh_info: dict, identity_file: Optional[str]):
+    """Print what to run on the pod once the data is there"""
+    print("Next steps:")
+    print(f"  1. SSH into RunPod: ssh {ssh_info['user']}@{ssh_info['host']} -p {ssh_info['port']}" + (f" -i {shlex.quote(identity_file)}" if identity_file else ""))
+    print("  2. cd /workspace/disstrack-finetune")
+    print("  3. bash scripts/finetune_roastme_simple.sh")
+    print()
+
+def sync_data(ssh_info: dict, local_data_dir: str = "data", remote_path: str = "/workspace/disstrack-finetune/data", parallel: int = 1, link_mbps: Optional[float] = None, initial: bool = False, assume_yes: bool = False, retries: int = 2, checksum_manifest: bool = False, auto_bwlimit: bool = False):
     """
     Rsync data folder to RunPod instance
+    parallel > 1 splits the files across that many concurrent rsync streams
+    link_mbps (if known) turns compression and delta transfer off on fast links
+    initial streams a tar archive instead (first push to an empty pod)
+    assume_yes skips the confirmation prompt (also skipped without a TTY
+    on stdin, or with DISSTRACK_ASSUME_YES=1)
+    retries is the number of extra attempts after a transient rsync failure
+    checksum_manifest sends only files whose XXH3 hash differs from the
+    manifest left on the pod by the last such sync (needs xxhash)
+    auto_bwlimit probes the upload speed and caps rsync at 80% of it (also
+    used as link_mbps if that is not given)
     """
     
     # Expand home directory in identity file path
@@ -61,56 +414,167 @@ def sync_data(ssh_info: dict, local_data_dir: str = "data", remote_path: str = "
         print(f"❌ Local data directory not found: {local_data_dir}")
         sys.exit(1)
     
+    if identity_file and not Path(identity_file).is_file():
+        print(f"❌ SSH key not found: {identity_file}")
+        sys.exit(1)
+    
     # Build rsync command
+    # The key path is quoted: rsync splits -e itself (honoring quotes), as
+    # does shlex.split for the direct ssh calls
+    ssh_cmd = f"ssh -p {ssh_info['port']}" + (f" -i {shlex.quote(identity_file)}" if identity_file else "") + " -o ConnectTimeout=30"
+    mux_options = ssh_mux_options(ssh_info)
+    if mux_options:
+        ssh_cmd += " " + " ".join(mux_options)
+    destination = f"{ssh_info['user']}@{ssh_info['host']}"
+    # rsync's host:path form needs IPv6 literals in brackets
+    remote_host = f"[{ssh_info['host']}]" if ":" in ssh_info['host'] else ssh_info['host']
+    remote_spec = f"{ssh_info['user']}@{remote_host}:{remote_path}"
+    
+    # Staying under the measured rate keeps shared pod networks from
+    # throttling or dropping packets at full line rate
+    measured_mbps = None
+    if auto_bwlimit:
+        try:
+            measured_mbps = probe_upload_mbps(ssh_cmd, destination)
+            print(f"📶 Measured upload: {measured_mbps:.0f} Mbit/s")
+            if link_mbps is None:
+                link_mbps = measured_mbps
+        except subprocess.CalledProcessError:
+            print("⚠️  Upload probe failed, syncing without a bandwidth limit")
+    
     rsync_cmd = [
         "rsync",
-        "-avz",
-        "--progress",
+        "-av",
+        *rsync_transfer_flags(link_mbps),
+        # One updating progress line and a summary, no per-file names
+        "--info=progress2,stats2,name0",
+        # Keep interrupted files so a re-run resumes them as delta basis
+        # (no --append-verify: it skips destination files that are not
+        # shorter, e.g. images normalize_images.py re-encoded smaller)
+        "--partial-dir=.rsync-partial",
+        "--timeout=120",
         "-e",
-        f"ssh -p {ssh_info['port']}" + (f" -i {identity_file}" if identity_file else ""),
+        ssh_cmd,
         f"{local_data_dir}/",  # Trailing slash is important!
-        f"{ssh_info['user']}@{ssh_info['host']}:{remote_path}/"
+        f"{remote_spec}/"
     ]
     
+    tar_stages = None
+    if initial:
+        # zstd must also be installed on the pod to unpack the stream
+        compress = shutil.which("zstd") is not None and (link_mbps is None or link_mbps < FAST_LINK_MBPS)
+        tar_stages = tar_push_stages(ssh_cmd, destination, local_data_dir, remote_path, compress)
+    
+    files = local_file_sizes(local_path)
+    local_bytes = sum(size for size, _ in files)
+    
+    # Manifest mode hashes the content instead of trusting timestamps (data
+    # is often regenerated), then lists only the changed files; rsync must
+    # not skip those on a matching size and mtime, hence --ignore-times
+    manifest = None
+    to_send = files
+    if checksum_manifest:
+        if xxhash is None:
+            print("⚠️  xxhash not installed, --checksum-manifest falls back to a plain rsync")
+        else:
+            manifest = build_manifest(local_path, files)
+            if not initial:
+                remote_manifest = fetch_remote_manifest(ssh_cmd, destination, remote_path)
+                to_send = [(size, rel_path) for size, rel_path in files if remote_manifest.get(rel_path) != manifest[rel_path]]
+                rsync_cmd.insert(1, "--ignore-times")
+    
+    if initial:
+        buckets = []
+    elif manifest is not None:
+        buckets = split_into_buckets(to_send, max(parallel, 1))
+    else:
+        buckets = split_into_buckets(files, parallel) if parallel > 1 else []
+    
+    if measured_mbps is not None:
+        # --bwlimit is per rsync process (KiB/s), so parallel streams share the cap
+        bwlimit = int(measured_mbps * 0.8 * 1e6 / 8 / 1024 / max(len(buckets), 1))
+        rsync_cmd.insert(1, f"--bwlimit={max(bwlimit, 1)}")
+    
     print("=" * 70)
     print("📤 SYNCING DATA TO RUNPOD")
     print("=" * 70)
     print()
     print(f"Source:      {local_path.absolute()}")
-    print(f"Destination: {ssh_info['user']}@{ssh_info['host']}:{remote_path}")
+    print(f"Destination: {remote_spec}")
     print(f"Port:        {ssh_info['port']}")
     if identity_file:
         print(f"SSH Key:     {identity_file}")
+    
+    # Catch a too-small pod disk now, not after gigabytes were sent
+    # (files already on the pod only need their changes sent)
+    try:
+        free_bytes, remote_bytes = remote_space(ssh_cmd, destination, remote_path)
+        print(f"Size:        {len(files):,} files, {format_gib(local_bytes)} local / {format_gib(free_bytes)} free")
+        if local_bytes - remote_bytes > free_bytes * 0.95:
+            print()
+            print(f"❌ Not enough space on the pod: need ~{format_gib(local_bytes - remote_bytes)}, {format_gib(free_bytes)} free")
+            sys.exit(1)
+    except (subprocess.CalledProcessError, ValueError):
+        print(f"Size:        {len(files):,} files, {format_gib(local_bytes)} local (⚠️  could not check free space on the pod)")
     print()
     print("Command:")
-    print(" ".join(rsync_cmd))
+    if tar_stages:
+        print(" | ".join(" ".join(shlex.quote(arg) for arg in cmd) for cmd in tar_stages))
+    else:
+        print(" ".join(rsync_cmd))
+    if manifest is not None and not initial:
+        print(f"(manifest: {len(to_send):,} of {len(files):,} files changed)")
+    if len(buckets) > 1:
+        print(f"(split across {len(buckets)} parallel rsync streams)")
     print()
     print("=" * 70)
     print()
     
-    # Confirm before syncing
-    response = input("Proceed with sync? (yes/no): ").strip().lower()
-    if response != "yes":
-        print("❌ Sync cancelled")
-        sys.exit(0)
+    if manifest is not None and not initial and not to_send:
+        print("✅ Already up to date (every file matches the pod's manifest)")
+        return 0
+    
+    # Confirm before syncing (scripts and CI have nobody to answer)
+    if assume_yes or os.environ.get("DISSTRACK_ASSUME_YES") == "1" or not sys.stdin.isatty():
+        print("Proceeding without confirmation")
+    else:
+        response = input("Proceed with sync? (yes/no): ").strip().lower()
+        if response != "yes":
+            print("❌ Sync cancelled")
+            sys.exit(0)
     
     print()
     print("🚀 Starting sync...")
     print()
     
+    if not tar_stages and not buckets and retries == 0:
+        # A single rsync without retries needs no coordinating parent: print
+        # the next steps now and let rsync replace this process (its exit
+        # code is ours)
+        print_next_steps(ssh_info, identity_file)
+        sys.stdout.flush()
+        os.execvp(rsync_cmd[0], rsync_cmd)
+    
     # Execute rsync
     try:
-        result = subprocess.run(rsync_cmd, check=True)
+        if tar_stages:
+            run_pipeline(tar_stages)
+        elif buckets:
+            if mux_options and len(buckets) > 1:
+                # Open the shared master first, so the streams attach to it
+                # instead of racing to become master
+                subprocess.run(shlex.split(ssh_cmd) + [destination, "true"], check=True)
+            run_parallel_rsync(rsync_cmd, buckets, sum(size for size, _ in to_send), retries)
+        else:
+            run_rsync(rsync_cmd, retries)
+        if manifest is not None:
+            upload_manifest(ssh_cmd, destination, remote_path, manifest)
         print()
         print("=" * 70)
         print("✅ SYNC COMPLETE!")
         print("=" * 70)
         print()
-        print("Next steps:")
-        print(f"  1. SSH into RunPod: ssh {ssh_info['user']}@{ssh_info['host']} -p {ssh_info['port']}" + (f" -i {identity_file}" if identity_file else ""))
-        print("  2. cd /workspace/disstrack-finetune")
-        print("  3. bash scripts/finetune_roastme_simple.sh")
-        print()
+        print_next_steps(ssh_info, identity_file)
         return 0
     except subprocess.CalledProcessError as e:
         print()
@@ -127,19 +591,52 @@ def sync_data(ssh_info: dict, local_data_dir: str = "data", remote_path: str = "
         return 1
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python tools/sync_data_to_runpod.py \"<ssh-connection-string>\"")
-        print()
-        print("Example:")
-        print("  python tools/sync_data_to_runpod.py \"ssh root@213.181.122.217 -p 13186 -i ~/.ssh/id_ed25519\"")
-        print()
-        sys.exit(1)
+    import argparse
     
-    ssh_cmd = sys.argv[1]
+    parser = argparse.ArgumentParser(
+        description="Sync data folder to RunPod instance",
+        epilog='Example: python tools/sync_data_to_runpod.py "ssh root@213.181.122.217 -p 13186 -i ~/.ssh/id_ed25519"'
+    )
+    parser.add_argument("ssh_command", help="SSH connection string copied from RunPod")
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="Number of concurrent rsync streams (1 = single rsync with progress output)"
+    )
+    parser.add_argument(
+        "--link-mbps",
+        type=float,
+        default=None,
+        help=f"Link speed to the pod in Mbit/s; {FAST_LINK_MBPS}+ sends whole files uncompressed"
+    )
+    parser.add_argument(
+        "--initial",
+        action="store_true",
+        help="First push to an empty pod: stream one tar archive instead of rsync (needs zstd on both ends to compress)"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="Extra attempts after a transient rsync failure (0 = exec rsync directly, no retries)"
+    )
+    parser.add_argument(
+        "--checksum-manifest",
+        action="store_true",
+        help="Send only files whose XXH3 hash changed since the last manifest sync (needs xxhash)"
+    )
+    parser.add_argument(
+        "--auto-bwlimit",
+        action="store_true",
+        help="Probe the upload speed and cap rsync at 80%% of it (rsync paths only)"
+    )
+    parser.add_argument("-y", "--yes", action="store_true", help="Skip the confirmation prompt")
+    args = parser.parse_args()
     
     try:
-        ssh_info = parse_ssh_command(ssh_cmd)
-        exit_code = sync_data(ssh_info)
+        ssh_info = parse_ssh_command(args.ssh_command)
+        exit_code = sync_data(ssh_info, parallel=args.parallel, link_mbps=args.link_mbps, initial=args.initial, assume_yes=args.yes, retries=args.retries, checksum_manifest=args.checksum_manifest, auto_bwlimit=args.auto_bwlimit)
         sys.exit(exit_code)
     except ValueError as e:
         print(f"❌ Error parsing SSH command: {e}")